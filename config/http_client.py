@@ -0,0 +1,185 @@
+import bisect
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = 3  # 연결 타임아웃 (초)
+READ_TIMEOUT = 10  # 응답 타임아웃 (초)
+POOL_SIZE = 10  # 호스트별 keep-alive 연결 수
+FAILURE_THRESHOLD = 5  # 연속 실패 시 차단할 횟수
+RESET_TIMEOUT = 30  # 차단 후 다시 시도할 때까지의 시간 (초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # 지연 시간 히스토그램 구간 (초)
+
+
+# 호스트가 차단된 상태라 요청하지 않음
+class CircuitOpenError(Exception):
+    pass
+
+
+# 호스트별 circuit breaker: 연속 실패가 failure_threshold 이상이면 reset_timeout 동안 바로 실패
+# reset_timeout 이후에는 한 요청만 시도해 성공하면 다시 열고, 실패하면 다시 차단
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    # 결과를 기록하지 않고 끝난 시도 (호스트와 무관한 오류) - 다음 요청이 다시 시도할 수 있도록 해제
+    def release_trial(self):
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+# 요청 지연 시간 히스토그램 (구간별 누적 없이 건수 저장)
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+
+    # 건수, 평균, 구간별 건수, 근사 백분위 (구간 상한)
+    def snapshot(self):
+        with self.lock:
+            counts = list(self.counts)
+            total = self.total
+        count = sum(counts)
+        return {
+            "count": count,
+            "avg": total / count if count else 0.0,
+            "buckets": {str(bucket): counts[index] for index, bucket in enumerate(self.buckets)} | {"inf": counts[-1]},
+            "p50": self._percentile(counts, count, 0.5),
+            "p95": self._percentile(counts, count, 0.95),
+        }
+
+    def _percentile(self, counts, count, ratio):
+        if not count:
+            return 0.0
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= count * ratio:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+# 외부 서버(RPA-D, TRP) 요청용 HTTP 클라이언트
+# 호스트별 keep-alive 연결 풀과 circuit breaker, endpoint별 지연 시간 히스토그램 유지
+class HttpClient:
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, pool_size=POOL_SIZE,
+                 failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sessions = {}
+        self.breakers = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def _get_host(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _get_session(self, host):
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount(host, adapter)
+                self.sessions[host] = session
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.sessions[host], self.breakers[host]
+
+    def _get_histogram(self, endpoint):
+        with self.lock:
+            if endpoint not in self.histograms:
+                self.histograms[endpoint] = LatencyHistogram()
+            return self.histograms[endpoint]
+
+    # 요청 실행, 호스트가 차단된 경우 CircuitOpenError
+    # 연결/타임아웃 오류와 5xx 응답은 실패로 기록 (4xx는 호스트 상태와 무관)
+    def request(self, method, url, endpoint=None, **kwargs):
+        host = self._get_host(url)
+        session, breaker = self._get_session(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} 요청이 차단되었습니다. (연속 실패 {breaker.failures}회)")
+
+        kwargs.setdefault("timeout", self.timeout)
+        histogram = self._get_histogram(endpoint or f"{method} {host}{urlsplit(url).path}")
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            histogram.observe(time.perf_counter() - started)
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # 요청 데이터 오류 등은 실패로 기록하지 않음 (half-open 시도가 끝나지 않은 상태로 남지 않도록 해제)
+            breaker.release_trial()
+            raise
+        histogram.observe(time.perf_counter() - started)
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request("POST", url, endpoint=endpoint, **kwargs)
+
+    # endpoint별 지연 시간, 호스트별 차단 상태
+    def get_stats(self):
+        with self.lock:
+            histograms = dict(self.histograms)
+            breakers = dict(self.breakers)
+        return {
+            "endpoints": {endpoint: histogram.snapshot() for endpoint, histogram in histograms.items()},
+            "hosts": {host: breaker.state for host, breaker in breakers.items()},
+        }
+
+
+http_client = HttpClient()  # 프로세스 공용 클라이언트
@@ -0,0 +1,95 @@
+import functools
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+RESPONSE_KEY = "idempotency:{user_id}:{path}:{key}"  # 저장된 응답
+LOCK_KEY = "idempotency-lock:{user_id}:{path}:{key}"  # 처리 중 표시
+RESPONSE_TIMEOUT = 24 * 60 * 60  # 응답 저장 시간 (초)
+LOCK_TIMEOUT = 60  # 처리 중 표시 유지 시간 (초), 처리 중 서버가 중단된 경우 대비
+MAX_KEY_LENGTH = 255
+
+
+# 요청 내용 해시 (같은 키로 다른 요청을 보냈는지 확인), 파일은 이름과 크기만 사용
+def get_request_fingerprint(request):
+    if hasattr(request.data, "lists"):
+        data = {key: values for key, values in request.data.lists()}
+    else:
+        data = request.data
+
+    def default(value):
+        if isinstance(value, UploadedFile):
+            return [value.name, value.size]
+        return str(value)
+
+    body = json.dumps(data, sort_keys=True, default=default, ensure_ascii=False)
+    return hashlib.sha256(f"{request.method} {body}".encode()).hexdigest()
+
+
+# Idempotency-Key 헤더가 있는 요청은 같은 키의 재시도에 처음 응답을 그대로 반환 (DB, 외부 서버 호출 없음)
+# - 같은 키로 처리 중인 요청이 있으면 409
+# - 같은 키로 다른 내용을 보내면 422
+# - 5xx 응답은 저장하지 않음 (재시도 시 다시 처리)
+def idempotent(view_method):
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({
+                "result": "false",
+                "message": f"{IDEMPOTENCY_HEADER}는 {MAX_KEY_LENGTH}자 이하여야 합니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        names = {"user_id": request.user.id, "path": request.path, "key": key}
+        response_key = RESPONSE_KEY.format(**names)
+        lock_key = LOCK_KEY.format(**names)
+        fingerprint = get_request_fingerprint(request)
+
+        stored = cache.get(response_key)
+        if stored is None:
+            lock_token = uuid.uuid4().hex
+            if not cache.add(lock_key, lock_token, timeout=LOCK_TIMEOUT):
+                response = Response({
+                    "result": "false",
+                    "message": "같은 요청을 처리하고 있습니다. 잠시 후 다시 시도해주세요."
+                }, status=status.HTTP_409_CONFLICT)
+                response["Retry-After"] = "1"
+                return response
+
+            try:
+                # 잠금을 얻는 사이 다른 요청이 처리를 끝낸 경우
+                stored = cache.get(response_key)
+                if stored is None:
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        cache.set(response_key, {
+                            "fingerprint": fingerprint,
+                            "status": response.status_code,
+                            "data": response.data,
+                        }, timeout=RESPONSE_TIMEOUT)
+                    return response
+            finally:
+                # 처리가 LOCK_TIMEOUT보다 오래 걸려 다른 요청이 잠금을 얻은 경우 그 잠금은 유지
+                if cache.get(lock_key) == lock_token:
+                    cache.delete(lock_key)
+
+        if stored["fingerprint"] != fingerprint:
+            return Response({
+                "result": "false",
+                "message": f"{IDEMPOTENCY_HEADER}가 다른 요청에 사용되었습니다."
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        response = Response(stored["data"], status=stored["status"])
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    return wrapper
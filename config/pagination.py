@@ -1,4 +1,48 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework.pagination import PageNumberPagination
 
 class Pagination(PageNumberPagination):
-    page_size = 10  # 기본 페이지 크기
\ No newline at end of file
+    page_size = 10  # 기본 페이지 크기
+
+
+# 커서(키셋) 페이지네이션: (created_date, id) 순서로 마지막 항목 다음부터 조회 (COUNT, OFFSET 없음)
+class KeysetPagination:
+    page_size = 10  # 기본 페이지 크기
+
+    # 마지막 항목의 (created_date, id)를 외부에서 알 수 없는 문자열로 변환
+    @staticmethod
+    def encode_cursor(obj):
+        value = json.dumps([obj.created_date.isoformat(), obj.id])
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+    # 잘못된 커서인 경우 ValueError
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_date, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            created_date = parse_datetime(created_date)
+        except Exception:
+            raise ValueError("유효하지 않은 커서입니다.")
+        if created_date is None or not isinstance(obj_id, int):
+            raise ValueError("유효하지 않은 커서입니다.")
+        return created_date, obj_id
+
+    # (현재 페이지 항목 목록, 다음 페이지 커서 또는 None) 반환
+    def paginate_queryset(self, queryset, cursor=None):
+        queryset = queryset.order_by("created_date", "id")
+        if cursor:
+            created_date, obj_id = self.decode_cursor(cursor)
+            # created_date__gte 조건으로 인덱스 범위 검색이 커서 위치에서 시작하도록 함
+            queryset = queryset.filter(created_date__gte=created_date).filter(
+                Q(created_date__gt=created_date) | Q(id__gt=obj_id)
+            )
+
+        # 다음 페이지 존재 여부 확인을 위해 한 개 더 조회
+        items = list(queryset[:self.page_size + 1])
+        next_cursor = self.encode_cursor(items[self.page_size - 1]) if len(items) > self.page_size else None
+        return items[:self.page_size], next_cursor
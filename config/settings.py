@@ -46,6 +46,10 @@ TWILIO_ACCOUNT_SID = my_settings.TWILIO_ACCOUNT_SID
 TWILIO_AUTH_TOKEN = my_settings.TWILIO_AUTH_TOKEN
 TWILIO_PHONE_NUMBER = my_settings.TWILIO_PHONE_NUMBER
 
+# TRP 견적 일괄 동기화 (run_scheduler가 sync_trp 실행)
+# TRP에 /dispatch/estimates/sync API가 준비되기 전까지는 False: 견적마다 outbox로 TRP에 전송
+TRP_BATCH_SYNC_ENABLED = os.getenv('TRP_BATCH_SYNC_ENABLED') == 'true'
+
 if os.getenv('DJANGO_ENV') == 'production':
     # 배포 환경
     CACHES = {
@@ -57,6 +61,9 @@ if os.getenv('DJANGO_ENV') == 'production':
             },
         }
     }
+    # 견적 상태 실시간 전송 (프로세스 간 전달)
+    ESTIMATE_EVENTS_BACKEND = 'dispatch.events.RedisEventBackend'
+    ESTIMATE_EVENTS_REDIS_URL = 'redis://127.0.0.1:6379/1'
 else:
     # 로컬 개발 환경
     CACHES = {
@@ -65,6 +72,8 @@ else:
             'LOCATION': 'unique-snowflake',
         }
     }
+    # 견적 상태 실시간 전송 (단일 프로세스 내 전달)
+    ESTIMATE_EVENTS_BACKEND = 'dispatch.events.InMemoryEventBackend'
 
 
 # Application definition
@@ -1,9 +1,16 @@
 from django.contrib import admin
-from .models import Estimate, EstimateAddress, Pay, VirtualEstimate, EstimateTime
+from .models import Estimate, EstimateAddress, Pay, VirtualEstimate, EstimateTime, OutboxMessage, Tariff, DeletedEstimate, BatchJobCheckpoint, TrpSyncState, TrpSyncCheckpoint, TrpSyncFailure
 # Register your models here.
 admin.site.register(EstimateTime)
 admin.site.register(Estimate)
 admin.site.register(EstimateAddress)
 admin.site.register(VirtualEstimate)
 admin.site.register(Pay)
+admin.site.register(OutboxMessage)
+admin.site.register(Tariff)
+admin.site.register(DeletedEstimate)
+admin.site.register(BatchJobCheckpoint)
+admin.site.register(TrpSyncState)
+admin.site.register(TrpSyncCheckpoint)
+admin.site.register(TrpSyncFailure)
 
@@ -0,0 +1,152 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .models import BatchJobCheckpoint
+
+
+# 전체 워커의 진행 상황 (처리 행 수, 처리한 ID 범위 기준 ETA)
+class BatchProgress:
+    def __init__(self, checkpoints):
+        self.total_span = sum(checkpoint.range_end - checkpoint.range_start + 1 for checkpoint in checkpoints)
+        self.done_span = sum(checkpoint.last_id - checkpoint.range_start + 1 for checkpoint in checkpoints)
+        self.run_span = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def add(self, span, rows):
+        with self.lock:
+            self.done_span += span
+            self.run_span += span
+            self.rows += rows
+            elapsed = time.perf_counter() - self.started
+            rows_per_second = self.rows / elapsed if elapsed > 0 else 0.0
+            percent = self.done_span / self.total_span * 100 if self.total_span else 100.0
+            eta = elapsed * (self.total_span - self.done_span) / self.run_span if self.run_span else 0.0
+            return rows_per_second, percent, eta
+
+
+# ID 범위 단위로 queryset을 처리하는 관리 명령 기반 클래스
+# 하위 클래스는 job_name, get_queryset(), process_chunk(queryset, options)를 구현
+# - 청크마다 process_chunk와 진행 위치 저장을 한 트랜잭션으로 실행 (중단 후 다시 실행하면 이어서 처리)
+# - --workers N: 전체 ID 범위를 N개로 나눠 동시에 처리
+class BatchJobCommand(BaseCommand):
+    job_name = None
+    chunk_size = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=self.chunk_size, help="한 번에 처리할 ID 범위 크기")
+        parser.add_argument("--workers", type=int, default=1, help="동시에 처리할 워커 수 (ID 범위를 나눠 처리)")
+        parser.add_argument("--restart", action="store_true", help="저장된 진행 위치를 지우고 처음부터 실행")
+        parser.add_argument("--dry-run", action="store_true", help="변경하지 않고 대상 건수만 출력 (진행 위치 저장 안 함)")
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    # 청크(ID 범위로 제한된 queryset) 처리 후 처리한 행 수 반환
+    def process_chunk(self, queryset, options):
+        raise NotImplementedError
+
+    # 진행 중인 체크포인트가 있으면 이어서, 없으면 ID 범위를 workers개로 나눠 새로 생성
+    def get_checkpoints(self, options):
+        checkpoints = BatchJobCheckpoint.objects.filter(job_name=self.job_name)
+        if options["restart"] and not options["dry_run"]:
+            checkpoints.delete()
+
+        pending = list(checkpoints.filter(status="진행중").order_by("worker"))
+        if pending:
+            self.stdout.write(f"Resuming {self.job_name} with {len(pending)} workers")
+            return pending
+
+        id_range = self.get_queryset().aggregate(min_id=Min("pk"), max_id=Max("pk"))
+        if id_range["min_id"] is None:
+            return []
+
+        workers = max(1, options["workers"])
+        span = (id_range["max_id"] - id_range["min_id"] + workers) // workers
+        new_checkpoints = []
+        for worker in range(workers):
+            range_start = id_range["min_id"] + worker * span
+            range_end = min(range_start + span - 1, id_range["max_id"])
+            if range_start > range_end:
+                break
+            new_checkpoints.append(BatchJobCheckpoint(
+                job_name=self.job_name, worker=worker,
+                range_start=range_start, range_end=range_end, last_id=range_start - 1,
+            ))
+
+        if not options["dry_run"]:
+            with transaction.atomic():
+                checkpoints.delete()
+                BatchJobCheckpoint.objects.bulk_create(new_checkpoints)
+        return new_checkpoints
+
+    # 워커 하나가 담당 범위를 청크 단위로 처리
+    def run_checkpoint(self, checkpoint, progress, options):
+        queryset = self.get_queryset()
+        chunk_size = options["chunk_size"]
+
+        while checkpoint.last_id < checkpoint.range_end:
+            # 비어 있는 ID 구간은 건너뜀
+            next_id = (
+                queryset.filter(pk__gt=checkpoint.last_id, pk__lte=checkpoint.range_end)
+                .order_by("pk").values_list("pk", flat=True).first()
+            )
+            chunk_end = checkpoint.range_end if next_id is None else min(next_id + chunk_size - 1, checkpoint.range_end)
+
+            chunk_started = time.perf_counter()
+            with transaction.atomic():
+                count = 0
+                if next_id is not None:
+                    count = self.process_chunk(queryset.filter(pk__gte=next_id, pk__lte=chunk_end), options)
+                span = chunk_end - checkpoint.last_id
+                checkpoint.last_id = chunk_end
+                checkpoint.processed_count += count
+                if checkpoint.last_id >= checkpoint.range_end:
+                    checkpoint.status = "완료"
+                if not options["dry_run"]:
+                    checkpoint.save(update_fields=["last_id", "processed_count", "status", "updated_at"])
+
+            rows_per_second, percent, eta = progress.add(span, count)
+            if count:
+                self.stdout.write(
+                    f"[{self.job_name} #{checkpoint.worker}] ids {next_id}-{chunk_end}: {count} rows "
+                    f"in {(time.perf_counter() - chunk_started) * 1000:.1f} ms | "
+                    f"{percent:.1f}% {rows_per_second:.0f} rows/s ETA {eta:.0f}s"
+                )
+
+    def run_checkpoint_in_thread(self, checkpoint, progress, options):
+        try:
+            self.run_checkpoint(checkpoint, progress, options)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        checkpoints = self.get_checkpoints(options)
+        progress = BatchProgress(checkpoints)
+
+        # SQLite는 동시에 한 연결만 쓸 수 있으므로 워커 범위를 순서대로 처리
+        if len(checkpoints) > 1 and connection.vendor != "sqlite":
+            with ThreadPoolExecutor(max_workers=len(checkpoints)) as executor:
+                futures = [
+                    executor.submit(self.run_checkpoint_in_thread, checkpoint, progress, options)
+                    for checkpoint in checkpoints
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for checkpoint in checkpoints:
+                self.run_checkpoint(checkpoint, progress, options)
+
+        elapsed = time.perf_counter() - progress.started
+        processed_count = sum(checkpoint.processed_count for checkpoint in checkpoints)
+        verb = "would be processed" if options["dry_run"] else "processed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.job_name}: {processed_count} rows {verb} in {elapsed:.2f}s "
+            f"({progress.rows / elapsed if elapsed > 0 else 0:.0f} rows/s this run)."
+        ))
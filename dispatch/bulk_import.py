@@ -0,0 +1,103 @@
+from django.db import connection, transaction
+
+from .estimate_cache import bump_estimate_list_version
+from .models import Estimate, EstimateAddress, Pay, VehicleInfo, VirtualEstimate
+from .outbox import enqueue_estimates_created
+from .serializers import EstimateSerializer
+
+BATCH_SIZE = 500  # bulk_create 한 번에 저장할 행 수
+
+
+# bulk_create 후 생성된 ID가 필요한 경우 사용
+# INSERT 결과로 ID를 돌려주지 않는 DB(MySQL 등)는 한 행씩 저장
+def _create_all(model, objs, batch_size):
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+# 견적 목록을 검증 후 모델별로 bulk_create, (생성된 견적 ID 목록, 행별 오류 목록) 반환
+# 검증에 실패한 행은 제외하고 나머지 행만 저장, 저장한 사용자의 견적 리스트 캐시 버전 변경
+def import_estimates(user, rows, batch_size=BATCH_SIZE):
+    valid_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        serializer = EstimateSerializer(data=row)
+        if serializer.is_valid():
+            valid_rows.append(serializer.validated_data)
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    if not valid_rows:
+        return [], errors
+
+    with transaction.atomic():
+        # 출발지, 도착지
+        addresses = _create_all(
+            EstimateAddress,
+            [EstimateAddress(**data["departure"]) for data in valid_rows]
+            + [EstimateAddress(**data["arrival"]) for data in valid_rows],
+            batch_size=batch_size,
+        )
+        departures, arrivals = addresses[:len(valid_rows)], addresses[len(valid_rows):]
+
+        # 결제 정보 (없는 행은 None)
+        pays = iter(_create_all(
+            Pay,
+            [Pay(**data["pay"]) for data in valid_rows if data.get("pay")],
+            batch_size=batch_size,
+        ))
+        pays = [next(pays) if data.get("pay") else None for data in valid_rows]
+
+        # 차량 정보, 가견적
+        vehicle_infos = _create_all(
+            VehicleInfo,
+            [VehicleInfo(**data["vehicle_info"]) for data in valid_rows],
+            batch_size=batch_size,
+        )
+        virtual_estimates = _create_all(
+            VirtualEstimate,
+            [VirtualEstimate(price=data["virtual_estimate"]["price"]) for data in valid_rows],
+            batch_size=batch_size,
+        )
+        VehicleTypes = VirtualEstimate.vehicle_types.through
+        VehicleTypes.objects.bulk_create(
+            [
+                VehicleTypes(virtualestimate_id=virtual_estimate.id, vehicleinfo_id=vehicle_info.id)
+                for virtual_estimate, vehicle_info in zip(virtual_estimates, vehicle_infos)
+            ],
+            batch_size=batch_size,
+        )
+
+        # 견적
+        estimate_fields = [
+            {key: value for key, value in data.items() if key not in ("departure", "arrival", "pay", "vehicle_info", "virtual_estimate")}
+            for data in valid_rows
+        ]
+        estimates = _create_all(
+            Estimate,
+            [
+                Estimate(
+                    user=user,
+                    departure=departure,
+                    arrival=arrival,
+                    pay=pay,
+                    vehicle_info=vehicle_info,
+                    virtual_estimate=virtual_estimate,
+                    status="업체 확인중",
+                    **fields
+                )
+                for fields, departure, arrival, pay, vehicle_info, virtual_estimate
+                in zip(estimate_fields, departures, arrivals, pays, vehicle_infos, virtual_estimates)
+            ],
+            batch_size=batch_size,
+        )
+
+        # RPA-D 알림, TRP 전송 대기열 기록
+        enqueue_estimates_created(estimates, batch_size=batch_size)
+        # 사용자의 견적 리스트 캐시 무효화 (API, 관리 명령어 모두)
+        bump_estimate_list_version(user.id)
+
+    return [estimate.id for estimate in estimates], errors
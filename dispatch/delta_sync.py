@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .models import Estimate, DeletedEstimate
+
+CHANGES_LIMIT = 100  # 한 번에 반환할 최대 변경/삭제 건수
+# 수정 시간은 커밋 전에 정해지므로, 늦게 커밋된 트랜잭션이 토큰 위치보다 앞에 끼어들지 않도록
+# 최근 수정/삭제분은 다음 조회에서 전달
+CHANGES_LAG_SECONDS = 5
+
+
+# 마지막으로 전달한 (수정 시간, ID) 위치를 외부에서 알 수 없는 문자열로 변환
+def encode_token(changed_position, deleted_position):
+    value = json.dumps({"changed": changed_position, "deleted": deleted_position})
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+# 잘못된 토큰인 경우 ValueError, 토큰이 없으면 처음부터
+def decode_token(token):
+    if not token:
+        return None, None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return _parse_position(value["changed"]), _parse_position(value["deleted"])
+    except Exception:
+        raise ValueError("유효하지 않은 토큰입니다.")
+
+
+def _parse_position(position):
+    if position is None:
+        return None
+    timestamp, obj_id = position
+    timestamp = parse_datetime(timestamp)
+    if timestamp is None or not isinstance(obj_id, int):
+        raise ValueError("유효하지 않은 토큰입니다.")
+    return timestamp, obj_id
+
+
+def _format_position(timestamp, obj_id):
+    return [timestamp.isoformat(), obj_id]
+
+
+# (timestamp_field, id) 순서로 position 이후 항목 조회 (TRP 동기화에서도 사용)
+def after_position(queryset, timestamp_field, position):
+    queryset = queryset.order_by(timestamp_field, "id")
+    if position is None:
+        return queryset
+    timestamp, obj_id = position
+    return queryset.filter(**{f"{timestamp_field}__gte": timestamp}).filter(
+        Q(**{f"{timestamp_field}__gt": timestamp}) | Q(id__gt=obj_id)
+    )
+
+
+# 토큰 이후 변경/삭제된 사용자 견적과 다음 토큰 반환
+# 토큰이 없으면 전체 견적을 변경 내역으로 전달 (삭제 내역은 현재 시점부터)
+# CHANGES_LAG_SECONDS 이내에 수정/삭제된 견적은 다음 조회에서 전달
+def get_estimate_changes(user, token, limit=CHANGES_LIMIT):
+    changed_position, deleted_position = decode_token(token)
+    cutoff = now() - timedelta(seconds=CHANGES_LAG_SECONDS)
+
+    changed = list(
+        after_position(Estimate.objects.filter(user=user, updated_at__lte=cutoff), "updated_at", changed_position)
+        .select_related("departure", "arrival", "virtual_estimate")[:limit + 1]
+    )
+    deleted_queryset = DeletedEstimate.objects.filter(user=user, deleted_at__lte=cutoff)
+    if token:
+        deleted = list(after_position(deleted_queryset, "deleted_at", deleted_position)[:limit + 1])
+    else:
+        deleted = []
+        last_deleted = deleted_queryset.order_by("-deleted_at", "-id").first()
+        deleted_position = (last_deleted.deleted_at, last_deleted.id) if last_deleted else None
+
+    has_more = len(changed) > limit or len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    # 다음 토큰은 이번에 전달한 마지막 항목 위치 (없으면 이전 위치 유지)
+    if changed:
+        changed_position = (changed[-1].updated_at, changed[-1].id)
+    if deleted:
+        deleted_position = (deleted[-1].deleted_at, deleted[-1].id)
+    next_token = encode_token(
+        _format_position(*changed_position) if changed_position else None,
+        _format_position(*deleted_position) if deleted_position else None,
+    )
+    return changed, [item.estimate_id for item in deleted], next_token, has_more
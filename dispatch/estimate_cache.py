@@ -0,0 +1,72 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+LIST_VERSION_KEY = "estimates:list_version:{user_id}"  # 사용자별 견적 리스트 버전
+GLOBAL_VERSION_KEY = "estimates:version"  # 전체 견적 버전 (사용자 구분 없이 견적이 바뀔 때마다 증가)
+LIST_PAGE_KEY = "estimates:list:{user_id}:{version}:{query}"  # 버전별 견적 리스트 응답
+LIST_PAGE_TIMEOUT = 60 * 60  # 견적 리스트 응답 캐시 유지 시간 (초)
+
+
+# 캐시에서 사라진 버전은 현재 시간(ns)으로 다시 시작해 이전 버전과 겹치지 않음
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _incr_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+# 사용자별 견적 리스트 버전
+def get_estimate_list_version(user_id):
+    return _get_version(LIST_VERSION_KEY.format(user_id=user_id))
+
+
+# 전체 견적 버전 (리뷰 목록처럼 여러 사용자의 견적 정보를 보여주는 응답에 사용)
+def get_estimates_version():
+    return _get_version(GLOBAL_VERSION_KEY)
+
+
+def _bump(user_ids):
+    for user_id in set(user_ids):
+        if user_id is not None:
+            _incr_version(LIST_VERSION_KEY.format(user_id=user_id))
+    _incr_version(GLOBAL_VERSION_KEY)
+
+
+# 견적이 생성/수정/삭제된 사용자의 리스트 버전 증가 (커밋 이후 실행되어 변경 전 데이터가 새 버전으로 캐시되지 않음)
+def bump_estimate_list_version(*user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+# 사용자, 리스트 버전, 쿼리 파라미터로 구성한 캐시 키
+def get_estimate_list_cache_key(user_id, query_params):
+    query = "&".join(f"{key}={value}" for key, value in sorted(query_params.items()))
+    return LIST_PAGE_KEY.format(
+        user_id=user_id,
+        version=get_estimate_list_version(user_id),
+        query=hashlib.md5(query.encode()).hexdigest(),
+    )
+
+
+
+# 견적 리스트 ETag (사용자별 리스트 버전), 쿼리 파라미터별 구분은 URL로 이루어짐
+def get_estimate_list_etag(request, *args, **kwargs):
+    return f"estimates-{request.user.id}-{get_estimate_list_version(request.user.id)}"
+
+
+# 견적 상세 ETag (사용자별 리스트 버전 + 견적 ID)
+def get_estimate_detail_etag(request, estimate_id, *args, **kwargs):
+    return f"estimate-{estimate_id}-{request.user.id}-{get_estimate_list_version(request.user.id)}"
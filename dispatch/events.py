@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+# 프로세스 내 pub/sub (로컬 개발, 테스트용 - 같은 프로세스의 구독자에게만 전달됨)
+class InMemoryEventBackend:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, user_id):
+        return InMemorySubscription(self, user_id)
+
+    def _add(self, user_id, subscription):
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+
+    def _remove(self, user_id, subscription):
+        with self._lock:
+            self._subscribers[user_id].discard(subscription)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+
+class InMemorySubscription:
+    def __init__(self, backend, user_id):
+        self.backend = backend
+        self.user_id = user_id
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.backend._add(self.user_id, self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.backend._remove(self.user_id, self)
+
+    # 다른 스레드(동기 뷰)에서 호출되므로 구독자의 이벤트 루프로 전달
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    # 이벤트 반환, timeout 동안 이벤트가 없으면 None
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+# Redis pub/sub (배포 환경, 여러 프로세스 간 전달)
+class RedisEventBackend:
+    CHANNEL = "estimate_events:{user_id}"
+
+    def __init__(self, url=None):
+        self.url = url or settings.ESTIMATE_EVENTS_REDIS_URL  # 발행, 구독 모두 같은 Redis 사용
+        self.client = None
+
+    def publish(self, user_id, event):
+        if self.client is None:
+            import redis
+
+            self.client = redis.Redis.from_url(self.url)
+        self.client.publish(self.CHANNEL.format(user_id=user_id), json.dumps(event))
+
+    def subscribe(self, user_id):
+        return RedisSubscription(self.url, self.CHANNEL.format(user_id=user_id))
+
+
+class RedisSubscription:
+    def __init__(self, url, channel):
+        self.url = url
+        self.channel = channel
+
+    async def __aenter__(self):
+        import redis.asyncio as aioredis
+
+        self.client = aioredis.from_url(self.url)
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(self.channel)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.unsubscribe(self.channel)
+        await self.pubsub.close()
+        await self.client.close()
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return json.loads(message["data"]) if message else None
+
+
+_backend = None
+
+
+# settings.ESTIMATE_EVENTS_BACKEND 에 지정된 backend (프로세스당 하나)
+def get_event_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.ESTIMATE_EVENTS_BACKEND)()
+    return _backend
+
+
+# 견적 상태 변경 이벤트 발행 (커밋 이후 전달)
+def publish_estimate_event(estimate):
+    if estimate.user_id is None:
+        return
+
+    event = {
+        "type": "estimate_status",
+        "estimate_id": estimate.id,
+        "status": estimate.status,
+        "is_value_changed": estimate.is_value_changed,
+    }
+    user_id = estimate.user_id
+
+    def publish():
+        try:
+            get_event_backend().publish(user_id, event)
+        except Exception as e:
+            print(f"[ESTIMATE EVENT] Error publishing event for estimate {event['estimate_id']}: {e}")
+
+    transaction.on_commit(publish)
@@ -0,0 +1,32 @@
+import uuid
+
+from django.core.cache import cache
+
+LEASE_KEY = "lease:{name}"  # lease lock 캐시 키
+
+
+# 캐시 기반 lease lock 획득 (cache.add는 키가 없을 때만 저장되므로 한 프로세스만 성공)
+# 획득하면 해제에 필요한 토큰, 이미 다른 프로세스가 가지고 있으면 None 반환
+# 배포 환경의 Redis 캐시를 공유하는 모든 프로세스 간에 동작 (로컬 LocMemCache는 프로세스 내에서만)
+def acquire_lease(name, timeout):
+    token = uuid.uuid4().hex
+    if cache.add(LEASE_KEY.format(name=name), token, timeout=timeout):
+        return token
+    return None
+
+
+# 자신이 획득한 lease만 해제
+def release_lease(name, token):
+    key = LEASE_KEY.format(name=name)
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+# lease를 획득한 경우에만 작업 실행, 실행 여부 반환
+# lease는 작업이 끝나도 해제하지 않음 (같은 name으로 늦게 실행된 다른 인스턴스가 중복 실행하지 않도록 timeout까지 유지)
+def run_exclusive(name, func, timeout):
+    if acquire_lease(name, timeout) is None:
+        print(f"[SCHEDULER] Skipped {name}: already running or done on another instance")
+        return False
+    func()
+    return True
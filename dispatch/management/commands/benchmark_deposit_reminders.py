@@ -0,0 +1,110 @@
+import time
+from collections import Counter
+from datetime import datetime
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from firebase_admin import messaging
+
+from dispatch.models import Estimate, EstimateAddress, OutboxMessage
+from dispatch.outbox import process_due_messages
+from dispatch.views import EstimateNotificationScheduler
+from firebase import send_message
+from firebase.models import FCMToken
+from firebase.send_message import FakeTransport
+from user.models import User
+
+BENCHMARK_USERNAME_PREFIX = "benchmark_fcm_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row deposit reminder delivery with the shipped path (chunked fcm_batch outbox jobs "
+        "delivered by process_due_messages) using a fake FCM transport with injected latency "
+        "(admin notifications are not sent)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--estimates", type=int, default=3000, help="계약금 입금 대기 견적 수")
+        parser.add_argument("--latency", type=float, default=0.05, help="FCM 요청당 지연 시간 (초)")
+        parser.add_argument("--workers", type=int, default=1, help="run_worker 스레드 수")
+        parser.add_argument("--cleanup", action="store_true", help="측정 후 생성한 데이터 삭제")
+
+    def seed(self, count):
+        address = EstimateAddress.objects.create(address="benchmark", latitude="0", longitude="0")
+        User.objects.bulk_create([
+            User(username=f"{BENCHMARK_USERNAME_PREFIX}{index}", phone_number=f"f{index:010d}")
+            for index in range(count)
+        ])
+        users = list(User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX))
+        FCMToken.objects.bulk_create([FCMToken(user=user, token=f"benchmark-token-{user.id}") for user in users])
+        Estimate.objects.bulk_create([
+            Estimate(
+                user=user,
+                kinds_of_estimate="왕복",
+                departure=address,
+                arrival=address,
+                departure_date=datetime(2025, 5, 1, 9, 0),
+                return_date=datetime(2025, 5, 2, 18, 0),
+                distance=100,
+                status="계약금 입금 대기",
+            )
+            for user in users
+        ], batch_size=1000)
+
+    # 기존 방식: 견적마다 user, FCM 토큰 조회 후 한 건씩 전송
+    def run_serial(self, estimates, transport):
+        for estimate in estimates:
+            title, body = EstimateNotificationScheduler.build_user_notification(
+                estimate.departure_date, estimate.return_date
+            )
+            token = FCMToken.objects.get(user=estimate.user).token
+            message = messaging.Message(notification=messaging.Notification(title=title, body=body), token=token)
+            transport.send_each([message])
+
+    # 배포된 방식: 청크마다 fcm_batch 작업을 기록하고 run_worker와 같이 process_due_messages로 전송
+    def run_batched(self, estimates, transport, workers):
+        rows = list(estimates.order_by("id").values_list("id", "user_id", "departure_date", "return_date"))
+        chunk_size = EstimateNotificationScheduler.CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            EstimateNotificationScheduler.send_chunk_notifications(rows[start:start + chunk_size])
+
+        stats = Counter()
+        with mock.patch.object(send_message, "get_transport", return_value=transport):
+            while True:
+                sent_count, failed_count = process_due_messages(workers=workers)
+                if not sent_count and not failed_count:
+                    break
+                stats["sent_jobs"] += sent_count
+                stats["failed_jobs"] += failed_count
+        stats["fcm_messages"] = len(transport.sent)
+        return stats
+
+    def handle(self, *args, **options):
+        # process_due_messages는 대기 중인 모든 작업을 전송하므로 다른 작업이 없을 때만 실행
+        if OutboxMessage.objects.filter(status="대기", next_attempt_at__lte=now()).exists():
+            raise CommandError("대기 중인 outbox 작업이 있습니다. 벤치마크 전용 DB에서 실행하세요.")
+        last_message_id = OutboxMessage.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        self.seed(options["estimates"])
+        estimates = Estimate.objects.filter(
+            status="계약금 입금 대기", user__username__startswith=BENCHMARK_USERNAME_PREFIX
+        )
+
+        started = time.perf_counter()
+        self.run_serial(estimates, FakeTransport(latency=options["latency"]))
+        serial_elapsed = time.perf_counter() - started
+        self.stdout.write(f"serial:  {serial_elapsed:.2f}s")
+
+        started = time.perf_counter()
+        stats = self.run_batched(estimates, FakeTransport(latency=options["latency"]), options["workers"])
+        batched_elapsed = time.perf_counter() - started
+        self.stdout.write(f"batched: {batched_elapsed:.2f}s {dict(stats)}")
+        self.stdout.write(f"speedup: {serial_elapsed / batched_elapsed:.1f}x")
+
+        if options["cleanup"]:
+            OutboxMessage.objects.filter(id__gt=last_message_id, kind="fcm_batch").delete()
+            Estimate.objects.filter(user__username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+            EstimateAddress.objects.filter(address="benchmark").delete()
+            User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+            self.stdout.write("benchmark data removed")
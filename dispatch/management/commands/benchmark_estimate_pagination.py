@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from config.pagination import KeysetPagination
+from dispatch.estimate_cache import bump_estimate_list_version
+from dispatch.models import Estimate, EstimateAddress
+from dispatch.views import EstimateView
+from user.models import User
+
+BENCHMARK_USERNAME = "benchmark_pagination"
+
+
+class Command(BaseCommand):
+    help = "Compare page-number and cursor pagination latency of GET estimates at increasing page depths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="벤치마크 사용자에게 생성할 견적 수")
+        parser.add_argument("--depths", default="1,10,100,1000,5000", help="측정할 페이지 번호 (쉼표 구분)")
+        parser.add_argument("--repeat", type=int, default=5, help="페이지당 반복 측정 횟수")
+        parser.add_argument("--cleanup", action="store_true", help="측정 후 생성한 데이터 삭제")
+
+    # 벤치마크 사용자와 견적 데이터 생성 (이미 있으면 부족한 만큼만 추가)
+    def seed(self, rows):
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME, defaults={"phone_number": "00000000000"})
+        existing = Estimate.objects.filter(user=user).count()
+        if existing >= rows:
+            return user
+
+        address = EstimateAddress.objects.create(address="benchmark", latitude="0", longitude="0")
+        departure_date = datetime(2025, 1, 1, 9, 0)
+        batch = []
+        for index in range(existing, rows):
+            batch.append(Estimate(
+                user=user,
+                kinds_of_estimate="왕복",
+                departure=address,
+                arrival=address,
+                departure_date=departure_date + timedelta(hours=index),
+                distance=100,
+                status="업체 확인중",
+            ))
+            if len(batch) == 10000:
+                Estimate.objects.bulk_create(batch)
+                batch = []
+        Estimate.objects.bulk_create(batch)
+        self.stdout.write(f"seeded {rows - existing} estimates")
+        return user
+
+    # 같은 요청을 반복해 평균 응답 시간(ms) 측정
+    def measure(self, user, params, repeat):
+        # 배포 설정의 ALLOWED_HOSTS에 없는 기본 호스트(testserver)는 다음 페이지 링크 생성 시 DisallowedHost
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = EstimateView.as_view()
+        elapsed = 0.0
+        for _ in range(repeat):
+            # 캐시된 리스트 응답이 아닌 DB 조회 시간을 측정하도록 매번 리스트 캐시 버전 변경
+            bump_estimate_list_version(user.id)
+            request = factory.get("/estimates", params)
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = view(request)
+            elapsed += time.perf_counter() - started
+            assert response.status_code == 200, response.data
+        return elapsed / repeat * 1000
+
+    def handle(self, *args, **options):
+        user = self.seed(options["rows"])
+        estimates = Estimate.objects.filter(user=user).order_by("created_date", "id")
+        page_size = KeysetPagination.page_size
+
+        self.stdout.write(f"{'page':>8} {'page-number (ms)':>18} {'cursor (ms)':>12}")
+        for depth in [int(value) for value in options["depths"].split(",")]:
+            offset = (depth - 1) * page_size
+            if offset >= options["rows"]:
+                continue
+
+            # 해당 페이지 직전 항목의 커서 (측정 대상 아님)
+            cursor_params = {"pagination": "cursor"}
+            if offset:
+                cursor_params["cursor"] = KeysetPagination.encode_cursor(estimates[offset - 1])
+
+            page_ms = self.measure(user, {"page": depth}, options["repeat"])
+            cursor_ms = self.measure(user, cursor_params, options["repeat"])
+            self.stdout.write(f"{depth:>8} {page_ms:>18.2f} {cursor_ms:>12.2f}")
+
+        if options["cleanup"]:
+            Estimate.objects.filter(user=user).delete()
+            EstimateAddress.objects.filter(address="benchmark").delete()
+            user.delete()
+            self.stdout.write("benchmark data removed")
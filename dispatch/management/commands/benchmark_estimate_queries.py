@@ -0,0 +1,122 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from dispatch.models import Estimate, EstimateAddress
+from user.models import User
+
+BENCHMARK_USERNAME_PREFIX = "benchmark_query_"
+HOT_INDEX_NAMES = ["estimate_user_flags_idx", "estimate_deposit_wait_idx", "estimate_unfinished_idx"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed estimates and print query plans and timings of the hot estimate filters "
+        "with and without their indexes. Run against a benchmark database: "
+        "the 'before' pass drops the indexes inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="생성할 견적 수")
+        parser.add_argument("--users", type=int, default=1000, help="견적을 나눠 가질 사용자 수")
+        parser.add_argument("--batch-size", type=int, default=10000, help="bulk_create 한 번에 저장할 행 수")
+        parser.add_argument("--repeat", type=int, default=5, help="쿼리당 반복 측정 횟수")
+        parser.add_argument("--skip-seed", action="store_true", help="이미 생성한 데이터로 측정만 실행")
+        parser.add_argument("--cleanup", action="store_true", help="측정 후 생성한 데이터 삭제")
+
+    def seed(self, rows, users, batch_size):
+        user_ids = []
+        for index in range(users):
+            user, _ = User.objects.get_or_create(
+                username=f"{BENCHMARK_USERNAME_PREFIX}{index}",
+                defaults={"phone_number": f"b{index:010d}"},
+            )
+            user_ids.append(user.id)
+
+        address = EstimateAddress.objects.create(address="benchmark", latitude="0", longitude="0")
+        rng = random.Random(0)
+        statuses = ["업체 확인중", "계약금 입금 대기", "예약 완료"]
+        started = time.perf_counter()
+        batch = []
+        for index in range(rows):
+            departure_date = datetime(2024, 1, 1) + timedelta(hours=rng.randint(0, 24 * 730))
+            estimate_status = rng.choices(statuses, weights=[20, 5, 75])[0]
+            is_finished = estimate_status == "예약 완료" and rng.random() < 0.95
+            batch.append(Estimate(
+                user_id=rng.choice(user_ids),
+                kinds_of_estimate="왕복",
+                departure=address,
+                arrival=address,
+                departure_date=departure_date,
+                return_date=departure_date + timedelta(days=rng.randint(0, 3)),
+                distance=rng.randint(10, 900),
+                status=estimate_status,
+                is_finished=is_finished,
+                finished_date=departure_date.date() if is_finished else None,
+                is_value_changed=rng.random() < 0.1,
+            ))
+            if len(batch) == batch_size:
+                Estimate.objects.bulk_create(batch)
+                batch = []
+        Estimate.objects.bulk_create(batch)
+
+        # 통계 갱신
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Estimate._meta.db_table}")
+        self.stdout.write(f"seeded {rows} estimates in {time.perf_counter() - started:.1f}s")
+
+    # 측정할 쿼리 목록 (이름, 쿼리셋)
+    def get_hot_queries(self):
+        user_id = User.objects.filter(username=f"{BENCHMARK_USERNAME_PREFIX}0").values_list("id", flat=True).first()
+        today = now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return [
+            ("user list (is_finished, is_value_changed)",
+             Estimate.objects.filter(user_id=user_id, is_finished=False, is_value_changed=False)),
+            ("scheduler (status=계약금 입금 대기)",
+             Estimate.objects.filter(status="계약금 입금 대기")),
+            ("check_finished_estimates (is_finished=False, status=예약 완료)",
+             Estimate.objects.filter(is_finished=False, status="예약 완료", return_date__lt=today)),
+        ]
+
+    def run_queries(self, label, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {label} =="))
+        for name, queryset in self.get_hot_queries():
+            queryset = queryset.values_list("id", flat=True)
+            if connection.vendor == "postgresql":
+                plan = queryset.explain(analyze=True, buffers=True)
+            else:
+                plan = queryset.explain()
+
+            elapsed = 0.0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                count = len(list(queryset))
+                elapsed += time.perf_counter() - started
+
+            self.stdout.write(f"-- {name}: {count} rows, {elapsed / repeat * 1000:.2f} ms avg")
+            self.stdout.write(plan)
+
+    def handle(self, *args, **options):
+        if not options["skip_seed"]:
+            self.seed(options["rows"], options["users"], options["batch_size"])
+
+        # 인덱스 제거 후 측정 (트랜잭션 롤백으로 인덱스 복구)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index_name in HOT_INDEX_NAMES:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index_name)}")
+            self.run_queries("before (without hot indexes)", options["repeat"])
+            transaction.set_rollback(True)
+
+        self.run_queries("after (with hot indexes)", options["repeat"])
+
+        if options["cleanup"]:
+            Estimate.objects.filter(user__username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+            EstimateAddress.objects.filter(address="benchmark").delete()
+            User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+            self.stdout.write("benchmark data removed")
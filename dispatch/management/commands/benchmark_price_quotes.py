@@ -0,0 +1,77 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from dispatch import views
+from dispatch.pricing import calculate_price
+from dispatch.views import EstimatePriceView, EstimatePriceBatchView
+
+
+# 견적 금액 캐시를 거치지 않고 매번 계산 (요청당 계산 비용 비교용)
+class UncachedQuotes:
+    def get_price(self, tariff, *args):
+        return calculate_price(*args, tariff=tariff)
+
+
+class Command(BaseCommand):
+    help = "Compare quotes/sec of the per-request price path (without the quote cache) against the batch price path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="견적 조건 수")
+        parser.add_argument("--seed", type=int, default=0, help="랜덤 시드")
+
+    # 랜덤 견적 조건 생성
+    def build_quotes(self, count, seed):
+        rng = random.Random(seed)
+        quotes = []
+        for _ in range(count):
+            departure_date = date(2025, 1, 1) + timedelta(days=rng.randint(0, 364))
+            return_date = departure_date + timedelta(days=rng.randint(0, 4)) if rng.random() < 0.7 else None
+            quotes.append({
+                "distance": rng.randint(1, 900),
+                "departure_date": departure_date.isoformat(),
+                "return_date": return_date.isoformat() if return_date else None,
+                "kinds_of_estimate": rng.choice(["왕복", "편도", "셔틀"]),
+                "is_accompany": rng.random() < 0.3,
+                "people_count": rng.choice(["미정", "20", "45", "90", "130"]),
+            })
+        return quotes
+
+    def handle(self, *args, **options):
+        quotes = self.build_quotes(options["count"], options["seed"])
+        factory = APIRequestFactory()
+        single_view = EstimatePriceView.as_view()
+        batch_view = EstimatePriceBatchView.as_view()
+
+        # 기존 방식: 견적 조건마다 요청 한 번 (견적 금액 캐시 사용 안 함)
+        quote_cache, views.quote_cache = views.quote_cache, UncachedQuotes()
+        try:
+            started = time.perf_counter()
+            single_results = []
+            for quote in quotes:
+                response = single_view(factory.post("/estimates/approximate-price", quote, format="json"))
+                single_results.append(response.data["data"])
+            single_elapsed = time.perf_counter() - started
+        finally:
+            views.quote_cache = quote_cache
+
+        # 일괄 방식: 요청 한 번에 최대 MAX_QUOTES 건
+        started = time.perf_counter()
+        batch_results = []
+        for offset in range(0, len(quotes), EstimatePriceBatchView.MAX_QUOTES):
+            chunk = quotes[offset:offset + EstimatePriceBatchView.MAX_QUOTES]
+            response = batch_view(factory.post("/estimates/approximate-price/batch", {"quotes": chunk}, format="json"))
+            batch_results.extend(response.data["data"])
+        batch_elapsed = time.perf_counter() - started
+
+        if single_results != batch_results:
+            self.stderr.write(self.style.ERROR("Batch results differ from per-request results."))
+            return
+
+        self.stdout.write(f"quotes: {len(quotes)}")
+        self.stdout.write(f"per-request: {single_elapsed:.3f}s ({len(quotes) / single_elapsed:.0f} quotes/s)")
+        self.stdout.write(f"batch:       {batch_elapsed:.3f}s ({len(quotes) / batch_elapsed:.0f} quotes/s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {single_elapsed / batch_elapsed:.1f}x, results identical"))
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from dispatch.models import Estimate, EstimateAddress, OutboxMessage
+from dispatch.views import EstimateStatusUpdateView, EstimateStatusBatchUpdateView
+from my_settings import ALLOWED_HOSTS
+from user.models import User
+
+BENCHMARK_USERNAME_PREFIX = "benchmark_confirm_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare confirming estimates one request at a time (estimates/confirm) with "
+        "the batch endpoint (estimates/confirm/batch), reporting time and query counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--estimates", type=int, default=500, help="확정할 견적 수")
+        parser.add_argument("--batch-size", type=int, default=EstimateStatusBatchUpdateView.MAX_ITEMS, help="일괄 요청 하나에 담을 견적 수")
+        parser.add_argument("--cleanup", action="store_true", help="측정 후 생성한 데이터 삭제")
+
+    def seed(self, count):
+        address = EstimateAddress.objects.create(address="benchmark", latitude="0", longitude="0")
+        User.objects.bulk_create([
+            User(username=f"{BENCHMARK_USERNAME_PREFIX}{index}", phone_number=f"c{index:010d}")
+            for index in range(count)
+        ])
+        users = list(User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX))
+        Estimate.objects.bulk_create([
+            Estimate(
+                user=user,
+                kinds_of_estimate="왕복",
+                departure=address,
+                arrival=address,
+                departure_date=datetime(2025, 5, 1, 9, 0),
+                return_date=datetime(2025, 5, 2, 18, 0),
+                distance=100,
+                status="계약금 입금 대기",
+            )
+            for user in users
+        ], batch_size=1000)
+
+    # 요청 실행 후 (소요 시간, 쿼리 수)
+    def measure(self, view, requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for request in requests:
+                response = view(request)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{response.status_code} - {response.data}")
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        self.seed(options["estimates"])
+        estimates = Estimate.objects.filter(user__username__startswith=BENCHMARK_USERNAME_PREFIX)
+        estimate_ids = list(estimates.values_list("id", flat=True))
+        last_outbox_id = OutboxMessage.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        factory = APIRequestFactory()
+        remote_addr = ALLOWED_HOSTS[0]
+
+        single_requests = [
+            factory.patch("/estimates/confirm", {"estimate_id": estimate_id, "status": "예약 완료"},
+                          format="json", REMOTE_ADDR=remote_addr)
+            for estimate_id in estimate_ids
+        ]
+        single_elapsed, single_queries = self.measure(EstimateStatusUpdateView.as_view(), single_requests)
+        self.stdout.write(f"single:  {single_elapsed:.2f}s {single_queries} queries ({len(single_requests)} requests)")
+
+        estimates.update(status="계약금 입금 대기")
+        batch_size = options["batch_size"]
+        batch_requests = [
+            factory.patch("/estimates/confirm/batch", {"items": [
+                {"estimate_id": estimate_id, "status": "예약 완료"}
+                for estimate_id in estimate_ids[start:start + batch_size]
+            ]}, format="json", REMOTE_ADDR=remote_addr)
+            for start in range(0, len(estimate_ids), batch_size)
+        ]
+        batch_elapsed, batch_queries = self.measure(EstimateStatusBatchUpdateView.as_view(), batch_requests)
+        self.stdout.write(f"batch:   {batch_elapsed:.2f}s {batch_queries} queries ({len(batch_requests)} requests)")
+        self.stdout.write(f"speedup: {single_elapsed / batch_elapsed:.1f}x")
+
+        if options["cleanup"]:
+            OutboxMessage.objects.filter(id__gt=last_outbox_id, kind="fcm_notification").delete()
+            estimates.delete()
+            EstimateAddress.objects.filter(address="benchmark").delete()
+            User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).delete()
+            self.stdout.write("benchmark data removed")
@@ -1,24 +1,31 @@
 # your_app/management/commands/check_finished_estimates.py
-from django.core.management.base import BaseCommand
+from django.db.models import DateField
+from django.db.models.functions import Cast
 from django.utils.timezone import now
+from dispatch.batch_job import BatchJobCommand
 from dispatch.models import Estimate
+from dispatch.estimate_cache import bump_estimate_list_version
 
-class Command(BaseCommand):
-    help = "Check and update is_finished for estimates"
+class Command(BatchJobCommand):
+    help = (
+        "Check and update is_finished for estimates (set-based UPDATE in primary key ranges, "
+        "resumable with checkpoints)"
+    )
+    job_name = "check_finished_estimates"
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write("Checking for finished estimates...")
+    # '예약 완료' 상태이고 완료되지 않았으며 return_date가 오늘 이전인 견적
+    def get_queryset(self):
+        today = now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return Estimate.objects.filter(is_finished=False, status="예약 완료", return_date__lt=today)
 
-        # '예약 완료' 상태이고 완료되지 않은 견적 가져오기
-        estimates = Estimate.objects.filter(is_finished=False, status="예약 완료")
-        updated_count = 0
+    def process_chunk(self, queryset, options):
+        if options["dry_run"]:
+            return queryset.count()
 
-        for estimate in estimates:
-            # return_date의 날짜와 now의 날짜 비교
-            if estimate.return_date and estimate.return_date.date() < now().date():
-                estimate.is_finished = True
-                estimate.finished_date = estimate.return_date.date()
-                estimate.save()
-                updated_count += 1
-
-        self.stdout.write(self.style.SUCCESS(f"{updated_count} estimates updated as finished."))
+        # 변경된 사용자의 견적 리스트 캐시 무효화 (커밋 이후)
+        bump_estimate_list_version(*queryset.values_list("user_id", flat=True).distinct())
+        return queryset.update(
+            is_finished=True,
+            finished_date=Cast("return_date", DateField()),
+            updated_at=now(),
+        )
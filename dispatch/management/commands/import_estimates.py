@@ -0,0 +1,53 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dispatch.bulk_import import import_estimates, BATCH_SIZE
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import estimates for a user from a JSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="견적 목록 파일 (.json: 견적 객체 리스트, .csv: departure.address 형식의 컬럼)")
+        parser.add_argument("--username", required=True, help="견적을 신청할 사용자명")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="bulk_create 한 번에 저장할 행 수")
+
+    # CSV의 "departure.address" 같은 컬럼을 중첩 객체로 변환 (빈 값은 제외)
+    def read_csv(self, path):
+        rows = []
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for record in csv.DictReader(f):
+                row = {}
+                for column, value in record.items():
+                    if value is None or value == "":
+                        continue
+                    target = row
+                    *parents, field = column.split(".")
+                    for parent in parents:
+                        target = target.setdefault(parent, {})
+                    target[field] = value
+                rows.append(row)
+        return rows
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['username']}")
+
+        path = options["path"]
+        if path.endswith(".csv"):
+            rows = self.read_csv(path)
+        else:
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+
+        created_ids, errors = import_estimates(user, rows, batch_size=options["batch_size"])
+
+        for error in errors:
+            self.stderr.write(f"row {error['index']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(f"created ids: {created_ids}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created_ids)} estimates imported, {len(errors)} rows rejected."))
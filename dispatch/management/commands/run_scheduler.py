@@ -0,0 +1,34 @@
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from dispatch.outbox import trp_batch_sync_enabled
+from dispatch.trp_sync import SYNC_INTERVAL_SECONDS
+from dispatch.views import EstimateNotificationScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the scheduled notification jobs (and sync_trp when TRP_BATCH_SYNC_ENABLED) in a dedicated process. "
+        "Several instances may run; a cache lease lets only one of them execute each job run."
+    )
+
+    def handle(self, *args, **options):
+        scheduler = BlockingScheduler(timezone=settings.TIME_ZONE)
+        EstimateNotificationScheduler.schedule_jobs(scheduler)
+        # TRP 일괄 동기화 (sync_trp가 lease로 여러 인스턴스 중 하나만 실행)
+        if trp_batch_sync_enabled():
+            scheduler.add_job(
+                call_command, 'interval', args=["sync_trp"], seconds=SYNC_INTERVAL_SECONDS,
+                id="sync_trp", coalesce=True, max_instances=1,
+            )
+
+        for job in scheduler.get_jobs():
+            self.stdout.write(f"scheduled {job.id}: {job.trigger}")
+        self.stdout.write("Starting scheduler...")
+
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            self.stdout.write("Scheduler stopped.")
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.http_client import http_client
+from dispatch.outbox import process_due_messages, get_lag_seconds, get_status_counts, MAX_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending outbox jobs (RPA-D, TRP, FCM) with retries, backoff and dead-lettering. "
+        "Several workers may run at once; jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="한 번에 전송할 메시지 수")
+        parser.add_argument("--interval", type=float, default=1.0, help="대기열이 비었을 때 대기 시간 (초)")
+        parser.add_argument("--workers", type=int, default=4, help="동시에 전송할 스레드 수")
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="최대 전송 시도 횟수")
+        parser.add_argument("--stats-interval", type=float, default=60.0, help="처리량/지연 출력 주기 (초)")
+        parser.add_argument("--once", action="store_true", help="대기열을 한 번만 처리하고 종료")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Starting outbox worker...")
+
+        total_sent = 0
+        total_failed = 0
+        window_sent = 0
+        window_started = time.monotonic()
+
+        while True:
+            sent_count, failed_count = process_due_messages(
+                options["batch_size"], options["max_attempts"], options["workers"]
+            )
+            total_sent += sent_count
+            total_failed += failed_count
+            window_sent += sent_count
+
+            # 처리량(건/초), 지연(가장 오래된 대기 메시지), 대기/실패 건수 출력
+            elapsed = time.monotonic() - window_started
+            if options["once"] or elapsed >= options["stats_interval"]:
+                throughput = window_sent / elapsed if elapsed > 0 else 0.0
+                counts = get_status_counts()
+                self.stdout.write(
+                    f"[OUTBOX] sent={total_sent} failed={total_failed} "
+                    f"throughput={throughput:.1f}/s lag={get_lag_seconds():.1f}s "
+                    f"pending={counts.get('대기', 0)} dead={counts.get('실패', 0)}"
+                )
+                self.write_http_stats()
+                window_sent = 0
+                window_started = time.monotonic()
+
+            if options["once"]:
+                break
+
+            # 처리할 메시지가 없으면 잠시 대기
+            if sent_count + failed_count == 0:
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"{total_sent} messages sent, {total_failed} attempts failed."))
+
+    # 외부 서버 endpoint별 지연 시간과 차단된 호스트 출력
+    def write_http_stats(self):
+        stats = http_client.get_stats()
+        for endpoint, latency in stats["endpoints"].items():
+            self.stdout.write(
+                f"[HTTP] {endpoint} count={latency['count']} avg={latency['avg'] * 1000:.0f}ms "
+                f"p50<={latency['p50']}s p95<={latency['p95']}s"
+            )
+        for host, state in stats["hosts"].items():
+            if state != "closed":
+                self.stdout.write(f"[HTTP] {host} circuit {state}")
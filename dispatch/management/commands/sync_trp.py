@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dispatch.locks import acquire_lease, release_lease
+from dispatch.trp_sync import sync_changed_estimates, reconcile_all_estimates, TrpSyncError, SYNC_BATCH_SIZE
+
+LEASE_NAME = "sync_trp"
+LEASE_SECONDS = 10 * 60  # 동기화 실행 lease (초), 실행이 끝나면 해제
+
+
+class Command(BaseCommand):
+    help = (
+        "Push estimates changed since the last acknowledged sync to TRP in batched, diff-only requests. "
+        "Estimates TRP rejects are recorded as TrpSyncFailure and skipped. "
+        "--full streams every estimate with all fields to repair drift and retry failures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE, help="요청 하나에 담을 견적 수")
+        parser.add_argument("--full", action="store_true", help="전체 견적을 전체 필드로 다시 전송")
+        parser.add_argument("--interval", type=float, default=0, help="반복 실행 주기 (초), 0이면 한 번만 실행")
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    # 한 번에 하나의 프로세스만 동기화 (진행 위치를 함께 갱신하지 않도록)
+    def run_once(self, options):
+        token = acquire_lease(LEASE_NAME, LEASE_SECONDS)
+        if token is None:
+            self.stdout.write("TRP sync is already running on another instance.")
+            return
+
+        started = time.perf_counter()
+        try:
+            if options["full"]:
+                stats = reconcile_all_estimates(options["batch_size"])
+            else:
+                stats = sync_changed_estimates(options["batch_size"])
+        except TrpSyncError as e:
+            # TRP 장애는 다음 실행에서 이어서 전송
+            self.stdout.write(self.style.WARNING(f"[TRP SYNC] failed, will retry: {e}"))
+            return
+        finally:
+            release_lease(LEASE_NAME, token)
+
+        self.stdout.write(
+            f"[TRP SYNC] {stats['estimates']} estimates acknowledged, {stats['failed']} failed, {stats['items']} items sent, "
+            f"{stats['fields']}/{stats['full_fields']} fields in {time.perf_counter() - started:.2f}s"
+        )
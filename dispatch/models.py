@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from user.models import User
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
 
 # 출발지, 도착지, 경유지에 사용될 주소 정보
 class EstimateAddress(models.Model):
@@ -54,6 +58,103 @@ class VirtualEstimate(models.Model):
 
 
 
+# 대기 시간에 따른 운임 비용 기본값 (200km 미만, 300km 미만, 400km 미만, 400km 이상)
+def default_waiting_time_prices():
+    return [150000, 90000, 30000, 0]
+
+
+# 성수기 (월) 기본값
+def default_peak_season_months():
+    return [4, 5, 9, 10]
+
+
+PUBLISHED_TARIFF_DELETE_ERROR = "사용된 요금표는 삭제할 수 없습니다. 사용을 중지해주세요."
+
+
+class TariffQuerySet(models.QuerySet):
+    # 사용 중이거나 사용된 적이 있는 요금표
+    def published(self):
+        return self.filter(models.Q(published_at__isnull=False) | models.Q(is_active=True))
+
+    # 관리자 페이지의 일괄 삭제도 사용된 요금표는 삭제할 수 없음
+    def delete(self):
+        if self.published().exists():
+            raise ValidationError(PUBLISHED_TARIFF_DELETE_ERROR)
+        result = super().delete()
+        transaction.on_commit(Tariff.publish_active_version)
+        return result
+
+
+# 견적 금액 요금표 (버전별), 활성화된 요금표 중 버전이 가장 높은 것을 사용
+class Tariff(models.Model):
+    objects = TariffQuerySet.as_manager()
+
+    VERSION_CACHE_KEY = "tariff:active_version"  # 워커들이 확인하는 활성 요금표 버전 캐시 키
+
+    version = models.PositiveIntegerField(unique=True, validators=[MinValueValidator(1)])  # 요금표 버전 (0은 기본 요금표)
+    basic_price_under_100km = models.IntegerField(default=500000)  # 100km 이하의 기본 요금
+    basic_price_over_100km = models.IntegerField(default=692000)  # 100km 초과 시 기본 요금
+    waiting_time_prices = models.JSONField(default=default_waiting_time_prices)  # 대기 시간에 따른 운임 비용 (구간별 0~400km)
+    price_per_km_200_to_400 = models.IntegerField(default=3460)  # 200~400km 구간의 km당 요금
+    price_per_km_over_400 = models.IntegerField(default=2590)  # 400km 초과 구간의 km당 요금
+    weekday_price = models.IntegerField(default=150000)  # 평일 추가 요금
+    peak_season_price = models.IntegerField(default=200000)  # 성수기 추가 요금
+    daily_extra_price = models.IntegerField(default=692000)  # 하루 추가 시 추가 요금
+    driver_price = models.IntegerField(default=150000)  # 기사 동행 추가 요금
+    one_way_discount = models.FloatField(default=0.8)  # 편도 운행 시 할인율 (20% 할인)
+    luxury_extra_price = models.IntegerField(default=150000)  # 우등 버스 추가 요금
+    peak_season_months = models.JSONField(default=default_peak_season_months)  # 성수기 (월)
+    is_active = models.BooleanField(default=False)  # 사용 여부
+    published_at = models.DateTimeField(null=True, blank=True)  # 처음 사용된 시간 (이후 요금 수정 불가)
+    created_at = models.DateTimeField(auto_now_add=True)  # 생성 시간
+
+    # 버전과 함께 워커, 견적 금액 캐시에 반영되는 요금 항목
+    PRICE_FIELDS = (
+        "version", "basic_price_under_100km", "basic_price_over_100km", "waiting_time_prices",
+        "price_per_km_200_to_400", "price_per_km_over_400", "weekday_price", "peak_season_price",
+        "daily_extra_price", "driver_price", "one_way_discount", "luxury_extra_price", "peak_season_months",
+    )
+
+    @classmethod
+    def get_active_version(cls):
+        # 활성화된 요금표가 없으면 0 (기본 요금표)
+        return cls.objects.filter(is_active=True).order_by("-version").values_list("version", flat=True).first() or 0
+
+    @classmethod
+    def publish_active_version(cls):
+        # 캐시의 활성 버전을 갱신하면 각 워커가 다음 견적 계산 시 새 요금표를 불러옴
+        version = cls.get_active_version()
+        cache.set(cls.VERSION_CACHE_KEY, version, timeout=None)
+        return version
+
+    # 한 번 사용된 요금표는 요금을 바꿀 수 없음 (워커와 견적 금액 캐시가 버전으로만 구분하므로 새 버전으로 추가)
+    def clean(self):
+        self._meta.get_field("version").run_validators(self.version)
+        if self.pk is None:
+            return
+        stored = Tariff.objects.filter(pk=self.pk).published().values(*self.PRICE_FIELDS).first()
+        if stored and any(stored[field] != getattr(self, field) for field in self.PRICE_FIELDS):
+            raise ValidationError("사용된 요금표는 수정할 수 없습니다. 새 버전의 요금표를 추가해주세요.")
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        if self.is_active and self.published_at is None:
+            self.published_at = now()
+        super().save(*args, **kwargs)
+        transaction.on_commit(Tariff.publish_active_version)
+
+    # 사용된 요금표는 삭제할 수 없음 (같은 버전으로 다시 만들면 워커와 견적 금액 캐시가 이전 요금을 계속 사용)
+    def delete(self, *args, **kwargs):
+        if Tariff.objects.filter(pk=self.pk).published().exists():
+            raise ValidationError(PUBLISHED_TARIFF_DELETE_ERROR)
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(Tariff.publish_active_version)
+        return result
+
+    def __str__(self):
+        return f"Tariff v{self.version} ({'사용' if self.is_active else '미사용'})"
+
+
 # 견적
 class Estimate(models.Model):
     KINDS_OF_ESTIMATE_CHOICES = [
@@ -104,10 +205,50 @@ class Estimate(models.Model):
     is_finished = models.BooleanField(default=False)  # 완료 여부
     finished_date = models.DateField(null=True, blank=True)  # 완료 날짜
     is_value_changed = models.BooleanField(default=False) # 견적 수정 여부
+    updated_at = models.DateTimeField(auto_now=True)  # 마지막 수정 시간 (변경 내역 동기화 기준)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_date", "id"], name="estimate_user_created_idx"),  # 견적 리스트 커서 페이징
+            models.Index(fields=["user", "updated_at", "id"], name="estimate_user_updated_idx"),  # 견적 변경 내역 동기화
+            models.Index(fields=["updated_at", "id"], name="estimate_updated_idx"),  # TRP 동기화
+            models.Index(fields=["user", "is_finished", "is_value_changed"], name="estimate_user_flags_idx"),  # 견적 리스트 필터
+            models.Index(  # 계약금 입금 대기 알림 스케줄러
+                fields=["id"],
+                name="estimate_deposit_wait_idx",
+                condition=models.Q(status="계약금 입금 대기"),
+            ),
+            models.Index(  # check_finished_estimates
+                fields=["return_date"],
+                name="estimate_unfinished_idx",
+                condition=models.Q(is_finished=False, status="예약 완료"),
+            ),
+        ]
+
     def __str__(self):
         return f"Estimate: {self.kinds_of_estimate}, Status: {self.status}"
 
 
+# 삭제된 견적 기록 (변경 내역 동기화에서 삭제 여부 전달용)
+class DeletedEstimate(models.Model):
+    estimate_id = models.BigIntegerField()  # 삭제된 견적 ID
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)  # 삭제 시간
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "deleted_at", "id"], name="deleted_estimate_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted estimate {self.estimate_id}"
+
+
 # 리뷰 모델
 class Review(models.Model) :
     user = models.ForeignKey(
@@ -125,4 +266,98 @@ class Review(models.Model) :
 class ReviewFile(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="files")
     file = models.ImageField(upload_to="review_files/")
-    uploaded_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+# 외부 서버(RPA-D, TRP, FCM) 전송 작업 대기열 - 요청 처리와 같은 트랜잭션에서 기록되고 run_worker가 전송
+class OutboxMessage(models.Model):
+    KIND_CHOICES = [
+        ("rpad_notification", "RPA-D 알림"),
+        ("trp_estimate", "TRP 견적 전송"),
+        ("fcm_notification", "사용자 알림 (FCM)"),
+        ("fcm_batch", "사용자 묶음 알림 (FCM)"),
+        ("fcm_topic", "topic 알림 (FCM)"),
+        ("fcm_topic_subscription", "공지사항 topic 구독 (FCM)"),
+        ("notice_inbox", "공지사항 알림함 저장"),
+        ("admin_digest", "RPA-D 관리자 묶음 알림"),
+    ]
+
+    STATUS_CHOICES = [
+        ("대기", "대기"),
+        ("완료", "완료"),
+        ("실패", "실패"),  # 최대 시도 횟수 초과 또는 재시도할 수 없는 오류 (dead letter)
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)  # 전송 종류
+    payload = models.JSONField()  # 전송할 데이터
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="대기")  # 전송 상태
+    attempts = models.IntegerField(default=0)  # 전송 시도 횟수
+    next_attempt_at = models.DateTimeField(default=now)  # 다음 전송 시도 시간
+    last_error = models.TextField(null=True, blank=True)  # 마지막 실패 사유
+    created_at = models.DateTimeField(auto_now_add=True)  # 생성 시간
+    sent_at = models.DateTimeField(null=True, blank=True)  # 전송 완료 시간
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status}, {self.attempts}회 시도)"
+
+
+# 배치 작업 진행 위치 (작업, 워커별 ID 범위) - 중단된 작업은 last_id 다음부터 다시 실행
+class BatchJobCheckpoint(models.Model):
+    STATUS_CHOICES = [
+        ("진행중", "진행중"),
+        ("완료", "완료"),
+    ]
+
+    job_name = models.CharField(max_length=100)  # 작업 이름
+    worker = models.IntegerField(default=0)  # 워커 번호
+    range_start = models.BigIntegerField()  # 담당 ID 범위 시작
+    range_end = models.BigIntegerField()  # 담당 ID 범위 끝
+    last_id = models.BigIntegerField()  # 마지막으로 처리한 ID 범위 끝
+    processed_count = models.BigIntegerField(default=0)  # 처리한 행 수
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="진행중")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["job_name", "worker"], name="batch_job_checkpoint_worker_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_name} #{self.worker} ({self.status}, {self.last_id}/{self.range_end})"
+
+
+# TRP가 마지막으로 확인(ack)한 견적 데이터 - 다음 동기화 때 바뀐 필드만 전송
+class TrpSyncState(models.Model):
+    estimate = models.OneToOneField(Estimate, on_delete=models.CASCADE, related_name="trp_sync_state")
+    payload = models.JSONField()  # TRP에 전달된 견적 데이터
+    synced_at = models.DateTimeField()  # 마지막 확인 시간
+
+    def __str__(self):
+        return f"TRP sync state for estimate {self.estimate_id}"
+
+
+# TRP가 거부했거나 확인하지 않은 견적 (진행 위치는 넘어가고, 견적이 다시 수정되거나 --full 실행 시 재전송)
+class TrpSyncFailure(models.Model):
+    estimate = models.OneToOneField(Estimate, on_delete=models.CASCADE, related_name="trp_sync_failure")
+    item = models.JSONField()  # 전송한 항목
+    error = models.TextField()  # TRP 응답 또는 실패 사유
+    failed_at = models.DateTimeField()  # 마지막 실패 시간
+
+    def __str__(self):
+        return f"TRP sync failure for estimate {self.estimate_id}"
+
+
+# TRP 동기화 진행 위치 (마지막으로 확인된 견적의 수정 시간, ID)
+class TrpSyncCheckpoint(models.Model):
+    name = models.CharField(max_length=50, unique=True)  # 동기화 이름
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.last_updated_at}, {self.last_id})"
@@ -0,0 +1,369 @@
+import functools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils.timezone import now
+
+from config.http_client import http_client, CircuitOpenError, RESET_TIMEOUT
+from firebase.models import FCMToken
+from firebase.send_message import (
+    send_notification, send_notifications, send_topic_notification, subscribe_tokens_to_topic, NotificationError,
+    NOTICE_TOPIC,
+)
+from user.models import Notification
+from my_settings import DEV4_SERVER
+from .models import OutboxMessage
+
+RPA_D_NOTIFICATION_URL = f"{DEV4_SERVER}/user/notification"  # RPA-D 알림 API
+TRP_ESTIMATE_URL = f"{DEV4_SERVER}/dispatch/estimates"  # TRP 견적 전송 API
+
+MAX_ATTEMPTS = 8  # 최대 전송 시도 횟수, 초과 시 실패 처리
+BACKOFF_BASE_SECONDS = 5  # 재시도 대기 시간 기본값
+BACKOFF_MAX_SECONDS = 3600  # 재시도 대기 시간 최대값
+NOTICE_PUSH_BODY_LENGTH = 100  # 공지사항 푸시 알림 내용 최대 길이
+CLAIM_LEASE_SECONDS = 300  # 가져간 작업을 다른 워커가 다시 가져갈 수 있을 때까지의 시간 (워커 중단 대비)
+
+
+# 재시도해도 성공할 수 없는 오류 (바로 실패 처리)
+class PermanentError(Exception):
+    pass
+
+
+# RPA-D 새 견적 알림 데이터
+def build_rpad_notification(estimate):
+    return {
+        "title": "새 견적 신청 알림",
+        "content": f"새로운 견적이 신청되었습니다. 견적 ID: {estimate.id}",
+        "category": "일정",
+        "send_datetime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+# TRP 견적 전송 데이터
+def build_trp_payload(estimate):
+    return {
+        "estimate_id": estimate.id,
+
+        "departure": estimate.departure.address if estimate.departure and estimate.departure.address else "",
+        "arrival": estimate.arrival.address if estimate.arrival and estimate.arrival.address else "",
+        "departure_date": estimate.departure_date.strftime('%Y-%m-%d %H:%M:%S') if estimate.departure_date else "",
+        "arrival_date": estimate.return_date.strftime('%Y-%m-%d %H:%M:%S') if estimate.return_date else "",
+        "bus_cnt": estimate.vehicle_info.bus_count if estimate.vehicle_info and estimate.vehicle_info.bus_count else 0,
+
+        "bus_type": estimate.vehicle_info.bus_type if estimate.vehicle_info and estimate.vehicle_info.bus_type else "",
+        "customer": estimate.user.username if estimate.user and estimate.user.username else "",
+        "customer_phone": estimate.user.phone_number if estimate.user and estimate.user.phone_number else "",
+        "price": estimate.virtual_estimate.price if estimate.virtual_estimate and estimate.virtual_estimate.price else 0,
+        "distance": estimate.distance if estimate.distance else 0,
+
+        "payment_method": estimate.pay.price_type if estimate.pay and estimate.pay.price_type else "",
+        "operation_type": estimate.kinds_of_estimate if estimate.kinds_of_estimate else "",
+        "references": f"{estimate.stopover if estimate.stopover else ''} / {estimate.additional_requests if estimate.additional_requests else ''}".strip("/"),
+        "route": f"{estimate.departure.address if estimate.departure else ''} > {estimate.arrival.address if estimate.arrival else ''}".strip(">"),
+        # 추가적으로 RPAP에 없는 필드 처리
+        "contract_status": "보류",
+        "reservation_company": "성화투어",
+        "operating_company": "성화투어",
+        "driver_allowance": 0,
+        "cost_type": "",
+
+        "bill_place": "",
+        "collection_type": "",
+        "VAT": "y",
+        "total_price": 0,
+        "ticketing_info": "",
+
+        "order_type": "",
+        "driver_lease": "",
+        "vehicle_lease": "",
+
+        "time": "0",
+
+        "night_work_time": "0",
+        "distance_list": "",
+        "time_list": "",
+        "option": "",
+    }
+
+
+# TRP 일괄 동기화 사용 여부 (사용하면 TRP 전송은 sync_trp가 변경된 견적을 묶어서 전송, trp_sync.py)
+def trp_batch_sync_enabled():
+    return getattr(settings, "TRP_BATCH_SYNC_ENABLED", False)
+
+
+# 견적 신청 시 RPA-D 알림과 TRP 전송을 대기열에 기록 (호출하는 쪽의 트랜잭션 안에서 실행)
+def enqueue_estimate_created(estimate):
+    enqueue_estimates_created([estimate])
+
+
+# 여러 견적을 한 번에 대기열에 기록
+def enqueue_estimates_created(estimates, batch_size=500):
+    batch_sync = trp_batch_sync_enabled()
+    messages = []
+    for estimate in estimates:
+        messages.append(OutboxMessage(kind="rpad_notification", payload=build_rpad_notification(estimate)))
+        if not batch_sync:
+            messages.append(OutboxMessage(kind="trp_estimate", payload=build_trp_payload(estimate)))
+    OutboxMessage.objects.bulk_create(messages, batch_size=batch_size)
+
+
+# 사용자 알림(FCM)을 대기열에 기록
+def enqueue_user_notification(user_id, title, body):
+    OutboxMessage.objects.create(
+        kind="fcm_notification", payload={"user_id": user_id, "title": title, "body": body}
+    )
+
+
+# 여러 유저 알림을 한 번에 대기열에 기록, notifications: [(user_id, title, body), ...]
+def enqueue_user_notifications(notifications):
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(kind="fcm_notification", payload={"user_id": user_id, "title": title, "body": body})
+        for user_id, title, body in notifications
+    ])
+
+
+# 여러 유저 알림을 작업 하나로 대기열에 기록 (send_notifications로 토큰 조회와 FCM 전송을 묶어서 처리)
+def enqueue_notification_batch(notifications):
+    if notifications:
+        OutboxMessage.objects.create(kind="fcm_batch", payload={"notifications": [list(item) for item in notifications]})
+
+
+# 공지사항 전체 알림을 대기열에 기록: topic 푸시 한 번 + 사용자별 알림함 저장
+def enqueue_notice_broadcast(notice):
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(kind="fcm_topic", payload={
+            "topic": NOTICE_TOPIC,
+            "title": notice.title,
+            "body": notice.detail[:NOTICE_PUSH_BODY_LENGTH],
+        }),
+        OutboxMessage(kind="notice_inbox", payload={
+            "title": notice.title,
+            "content": notice.detail,
+            "category": "공지사항",
+        }),
+    ])
+
+
+# 새로 등록된 기기의 공지사항 topic 구독을 대기열에 기록
+def enqueue_topic_subscription(token, topic=NOTICE_TOPIC):
+    OutboxMessage.objects.create(kind="fcm_topic_subscription", payload={"token": token, "topic": topic})
+
+
+# 관리자 계약금 입금 확인 요청 알림 (견적 한 건)
+def build_deposit_check_notification(estimate_id, send_datetime):
+    return {
+        "title": "계약금 입금 확인 요청",
+        "content": f"견적 {estimate_id}의 계약금 입금을 확인해주세요.",
+        "category": "일정",
+        "send_datetime": send_datetime,
+    }
+
+
+# 관리자 계약금 입금 확인 요청을 page_size 건씩 묶어서 대기열에 기록
+# RPA-D가 묶음 알림을 거부(4xx)하면 해당 묶음은 견적별 알림으로 다시 기록됨
+def enqueue_deposit_check_digest(estimate_ids, page_size):
+    send_datetime = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    pages = [estimate_ids[start:start + page_size] for start in range(0, len(estimate_ids), page_size)]
+    messages = []
+    for page_number, page_ids in enumerate(pages, start=1):
+        notification = {
+            "title": "계약금 입금 확인 요청",
+            "content": (
+                f"계약금 입금 대기 견적 {len(estimate_ids)}건의 입금을 확인해주세요. "
+                f"({page_number}/{len(pages)}) 견적 {', '.join(str(estimate_id) for estimate_id in page_ids)}"
+            ),
+            "category": "일정",
+            "send_datetime": send_datetime,
+            "estimate_ids": page_ids,
+        }
+        fallback = [build_deposit_check_notification(estimate_id, send_datetime) for estimate_id in page_ids]
+        messages.append(OutboxMessage(kind="admin_digest", payload={"notification": notification, "fallback": fallback}))
+    OutboxMessage.objects.bulk_create(messages)
+
+
+# 외부 서버로 전송, 201이 아니면 예외 발생 (요청 자체가 잘못된 4xx는 재시도하지 않음)
+# 호스트가 차단된 경우(CircuitOpenError)는 바로 실패하고 시도 횟수에 포함하지 않고 재시도
+def post(url, payload, endpoint):
+    response = http_client.post(url, endpoint=endpoint, json=payload)
+    if response.status_code == 201:
+        return
+    error = f"{response.status_code} - {response.text}"
+    if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+        raise PermanentError(error)
+    raise RuntimeError(error)
+
+
+def deliver_fcm_notification(payload):
+    try:
+        send_notification(payload["user_id"], payload["title"], payload["body"])
+    except NotificationError as e:
+        if e.permanent:
+            raise PermanentError(str(e)) from e
+        raise
+
+
+# 일시적 오류로 전송하지 못한 알림만 남겨 재시도 (성공한 사용자에게 중복 전송하지 않도록)
+def deliver_fcm_batch(message):
+    retry = []
+    stats = send_notifications(message.payload["notifications"], retry=retry)
+    print(f"[OUTBOX] FCM batch {dict(stats)}")
+    if retry:
+        message.payload = {"notifications": retry}
+        message.save(update_fields=["payload"])
+        raise RuntimeError(f"FCM 일시적 오류로 {len(retry)}건을 전송하지 못했습니다.")
+
+
+def deliver_fcm_topic(payload):
+    try:
+        send_topic_notification(payload["topic"], payload["title"], payload["body"])
+    except NotificationError as e:
+        if e.permanent:
+            raise PermanentError(str(e)) from e
+        raise
+
+
+# 이미 구독했거나 삭제된 토큰은 건너뜀, 구독에 실패하면 재시도
+def deliver_topic_subscription(payload):
+    if not FCMToken.objects.filter(token=payload["token"], topic_subscribed=False).exists():
+        return
+    if not subscribe_tokens_to_topic([payload["token"]], payload["topic"]):
+        raise RuntimeError(f"topic 구독에 실패했습니다: {payload['topic']}")
+    FCMToken.objects.filter(token=payload["token"]).update(topic_subscribed=True)
+
+
+# 사용자별 알림함 저장 (실패 시 전체 롤백되어 재시도해도 중복 저장되지 않음)
+def deliver_notice_inbox(payload):
+    with transaction.atomic():
+        created_count = Notification.create_for_all_users(payload["title"], payload["content"], payload["category"])
+    print(f"[OUTBOX] Notice saved to {created_count} inboxes")
+
+
+def deliver_admin_digest(payload):
+    try:
+        post(RPA_D_NOTIFICATION_URL, payload["notification"], "admin_digest")
+    except PermanentError as e:
+        print(f"[OUTBOX] Admin digest rejected ({e}), queueing {len(payload['fallback'])} notifications")
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(kind="rpad_notification", payload=notification) for notification in payload["fallback"]
+        ])
+
+
+# 메시지 한 건 전송, 실패 시 예외 발생
+def deliver(message):
+    if message.kind == "rpad_notification":
+        post(RPA_D_NOTIFICATION_URL, message.payload, "rpad_notification")
+    elif message.kind == "trp_estimate":
+        post(TRP_ESTIMATE_URL, message.payload, "trp_estimate")
+    elif message.kind == "fcm_notification":
+        deliver_fcm_notification(message.payload)
+    elif message.kind == "fcm_batch":
+        deliver_fcm_batch(message)
+    elif message.kind == "fcm_topic":
+        deliver_fcm_topic(message.payload)
+    elif message.kind == "fcm_topic_subscription":
+        deliver_topic_subscription(message.payload)
+    elif message.kind == "notice_inbox":
+        deliver_notice_inbox(message.payload)
+    elif message.kind == "admin_digest":
+        deliver_admin_digest(message.payload)
+    else:
+        raise PermanentError(f"알 수 없는 전송 종류입니다: {message.kind}")
+
+
+# 시도 횟수에 따른 재시도 대기 시간 (지수 백오프 + 지터)
+def get_backoff_seconds(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+    return delay + random.uniform(0, delay / 2)
+
+
+# 전송 시간이 된 메시지를 batch_size 만큼 가져감 (SELECT ... FOR UPDATE SKIP LOCKED)
+# 가져간 메시지는 시도 횟수를 올리고 CLAIM_LEASE_SECONDS 동안 다른 워커에게 보이지 않음
+# 워커가 처리 중 중단되어 최대 시도 횟수를 넘긴 메시지는 실패 처리
+def claim_due_messages(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status="대기", next_attempt_at__lte=now())
+            .order_by("id")[:batch_size]
+        )
+        exhausted_ids = [message.id for message in messages if message.attempts >= max_attempts]
+        messages = [message for message in messages if message.attempts < max_attempts]
+
+        OutboxMessage.objects.filter(id__in=exhausted_ids).update(
+            status="실패", last_error="처리 중 중단되어 최대 시도 횟수를 초과했습니다."
+        )
+        OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            attempts=F("attempts") + 1,
+            next_attempt_at=now() + timedelta(seconds=CLAIM_LEASE_SECONDS),
+        )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+# 메시지 전송 후 오류 반환 (성공 시 None), 워커 스레드에서 실행한 경우 스레드의 DB 연결 정리
+def _deliver_safely(message, close_connection=False):
+    try:
+        deliver(message)
+        return None
+    except Exception as e:
+        return e
+    finally:
+        if close_connection:
+            connection.close()
+
+
+# 전송 시간이 된 메시지를 batch_size 만큼 workers개 스레드로 동시에 전송하고 (성공, 실패) 건수 반환
+# 실패한 메시지는 지수 백오프로 재시도, 최대 시도 횟수를 넘기거나 재시도할 수 없는 오류면 실패(dead letter) 처리
+def process_due_messages(batch_size=100, max_attempts=MAX_ATTEMPTS, workers=1):
+    messages = claim_due_messages(batch_size, max_attempts)
+    if workers > 1 and len(messages) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(functools.partial(_deliver_safely, close_connection=True), messages))
+    else:
+        errors = [_deliver_safely(message) for message in messages]
+
+    sent_count = 0
+    failed_count = 0
+    for message, error in zip(messages, errors):
+        if error is None:
+            message.status = "완료"
+            message.sent_at = now()
+            message.save(update_fields=["status", "sent_at"])
+            sent_count += 1
+            continue
+
+        message.last_error = f"{type(error).__name__}: {error}"
+        if isinstance(error, CircuitOpenError):
+            # 요청을 보내지 않았으므로 시도 횟수에 포함하지 않고 차단이 풀린 뒤 다시 전송
+            message.attempts -= 1
+            message.next_attempt_at = now() + timedelta(seconds=RESET_TIMEOUT)
+            message.save(update_fields=["last_error", "attempts", "next_attempt_at"])
+            failed_count += 1
+            continue
+        if isinstance(error, PermanentError) or message.attempts >= max_attempts:
+            message.status = "실패"
+        else:
+            message.next_attempt_at = now() + timedelta(seconds=get_backoff_seconds(message.attempts))
+        message.save(update_fields=["last_error", "status", "next_attempt_at"])
+        failed_count += 1
+
+    return sent_count, failed_count
+
+
+# 가장 오래 대기 중인 메시지의 대기 시간 (초)
+def get_lag_seconds():
+    oldest = OutboxMessage.objects.filter(status="대기").order_by("created_at").values_list("created_at", flat=True).first()
+    if oldest is None:
+        return 0.0
+    return (now() - oldest).total_seconds()
+
+
+# 대기, 실패(dead letter) 메시지 수
+def get_status_counts():
+    counts = OutboxMessage.objects.filter(status__in=["대기", "실패"]).values("status").annotate(count=Count("id")).order_by()
+    return {row["status"]: row["count"] for row in counts}
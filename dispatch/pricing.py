@@ -0,0 +1,152 @@
+from bisect import bisect_right
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Tariff
+
+# 거리 구간 경계 (km, 정수 거리 기준 "거리 < 경계"): 100km 이하 / 200km 미만 / 300km 미만 / 400km 미만 / 400km 이상
+DISTANCE_BREAKPOINTS = (101, 200, 300, 400)
+
+
+# 요금표를 거리 구간별 요금 테이블로 미리 계산해 둔 것 (프로세스마다 한 번만 생성)
+class CompiledTariff:
+    def __init__(self, tariff):
+        self.version = tariff.version
+        self.weekday_price = tariff.weekday_price
+        self.peak_season_price = tariff.peak_season_price
+        self.daily_extra_price = tariff.daily_extra_price
+        self.driver_price = tariff.driver_price
+        self.one_way_discount = tariff.one_way_discount
+        self.luxury_extra_price = tariff.luxury_extra_price
+        self.peak_season_months = frozenset(tariff.peak_season_months)
+
+        # 구간별 (고정 요금, 기준 거리, km당 요금): 기본 요금 + 대기 시간 비용 + 거리 초과 비용
+        under, over = tariff.basic_price_under_100km, tariff.basic_price_over_100km
+        waiting = tariff.waiting_time_prices
+        per_km, per_km_over_400 = tariff.price_per_km_200_to_400, tariff.price_per_km_over_400
+        bands = [
+            (under + waiting[0], 0, 0),  # 100km 이하
+            (over + waiting[0], 0, 0),  # 100km 초과 200km 미만
+            (over + waiting[1], 200, per_km),  # 200km 이상 300km 미만
+            (over + waiting[2], 200, per_km),  # 300km 이상 400km 미만
+            (over + waiting[3] + 200 * per_km, 400, per_km_over_400),  # 400km 이상
+        ]
+        self.breakpoints = DISTANCE_BREAKPOINTS
+        self.band_fixed, self.band_origin, self.band_rate = (tuple(column) for column in zip(*bands))
+
+        # 배열 연산용
+        self.breakpoints_array = np.asarray(self.breakpoints, dtype=np.int64)
+        self.band_fixed_array = np.asarray(self.band_fixed, dtype=np.int64)
+        self.band_origin_array = np.asarray(self.band_origin, dtype=np.int64)
+        self.band_rate_array = np.asarray(self.band_rate, dtype=np.int64)
+
+    # 거리에 따른 기본 요금 + 대기 시간 비용 + 거리 초과 비용
+    def get_distance_band_price(self, distance):
+        band = bisect_right(self.breakpoints, distance)
+        return self.band_fixed[band] + (distance - self.band_origin[band]) * self.band_rate[band]
+
+
+_compiled_tariff = None  # 현재 프로세스에서 사용 중인 요금표
+
+
+# 활성 요금표 반환, 캐시의 버전이 바뀐 경우에만 DB에서 다시 불러옴
+def get_active_tariff():
+    global _compiled_tariff
+
+    version = cache.get(Tariff.VERSION_CACHE_KEY)
+    if version is None:
+        version = Tariff.get_active_version()
+        cache.set(Tariff.VERSION_CACHE_KEY, version, timeout=None)
+
+    if _compiled_tariff is None or _compiled_tariff.version != version:
+        tariff = Tariff.objects.filter(version=version, is_active=True).first()
+        if tariff is None:
+            # 캐시의 버전이 비활성화/삭제된 경우 활성 버전을 다시 게시 (없으면 버전 0 기본 요금표)
+            version = Tariff.publish_active_version()
+            tariff = Tariff.objects.filter(version=version, is_active=True).first() or Tariff(version=0)
+        _compiled_tariff = CompiledTariff(tariff)
+    return _compiled_tariff
+
+
+# 견적 한 건의 금액 계산
+def calculate_price(distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days, tariff=None):
+    tariff = tariff or get_active_tariff()
+
+    # 총 비용 계산 (기본 요금 + 대기 시간 비용 + 거리 초과 비용)
+    total_price = tariff.get_distance_band_price(distance)
+
+    # 조건에 따른 요금 조정
+    if kinds_of_estimate == "편도":
+        total_price *= tariff.one_way_discount  # 편도 할인 적용
+    if is_weekday:
+        total_price += tariff.weekday_price  # 평일 요금 추가
+    if is_peak_season:
+        total_price += tariff.peak_season_price  # 성수기 요금 추가
+    if days > 1:
+        total_price += tariff.daily_extra_price * (days - 1)  # 추가 일수에 대한 요금 추가
+    if is_accompany:
+        total_price += tariff.driver_price  # 기사 동행 요금 추가
+
+    return int(total_price)  # 최종 요금 반환
+
+
+# 여러 견적의 금액을 배열 연산으로 한 번에 계산 (calculate_price와 같은 순서로 연산해 결과가 동일함)
+def calculate_prices(distances, kinds_of_estimates, is_weekdays, is_peak_seasons, is_accompanies, days_list, tariff=None):
+    tariff = tariff or get_active_tariff()
+
+    distance = np.asarray(distances, dtype=np.int64)
+    is_one_way = np.asarray([kinds == "편도" for kinds in kinds_of_estimates], dtype=bool)
+    is_weekday = np.asarray(is_weekdays, dtype=bool)
+    is_peak_season = np.asarray(is_peak_seasons, dtype=bool)
+    is_accompany = np.asarray(is_accompanies, dtype=bool)
+    days = np.asarray(days_list, dtype=np.int64)
+
+    # 거리 구간별 기본 요금 + 대기 시간 비용 + 거리 초과 비용
+    band = np.searchsorted(tariff.breakpoints_array, distance, side="right")
+    band_price = tariff.band_fixed_array[band] + (distance - tariff.band_origin_array[band]) * tariff.band_rate_array[band]
+    total_price = band_price.astype(np.float64)
+
+    # 조건에 따른 요금 조정
+    total_price = np.where(is_one_way, total_price * tariff.one_way_discount, total_price)
+    total_price += np.where(is_weekday, tariff.weekday_price, 0)
+    total_price += np.where(is_peak_season, tariff.peak_season_price, 0)
+    total_price += np.where(days > 1, tariff.daily_extra_price * (days - 1), 0)
+    total_price += np.where(is_accompany, tariff.driver_price, 0)
+
+    return np.trunc(total_price).astype(np.int64).tolist()  # int()와 같은 방식으로 소수점 버림
+
+
+# 입력 데이터에서 운행 일수, 평일 여부, 성수기 여부 계산
+def get_quote_conditions(departure_date, return_date, tariff=None):
+    tariff = tariff or get_active_tariff()
+
+    days = 1  # 기본 운행 일수
+    if return_date:  # 복귀 날짜가 있을 경우 출발일과 복귀일의 차이 계산
+        days = (return_date - departure_date).days + 1
+
+    is_weekday = departure_date.weekday() < 5  # 평일 여부 확인
+    is_peak_season = departure_date.month in tariff.peak_season_months  # 성수기 여부 확인
+    return days, is_weekday, is_peak_season
+
+
+# 인원 수에 따른 추천 버스 대수 (45명 기준)
+def get_recommended_bus_count(people_count):
+    if people_count != "미정" and people_count.isdigit():  # 인원이 숫자일 경우 버스 대수 계산
+        if int(people_count) > 45:
+            return (int(people_count) + 44) // 45
+    return 1
+
+
+# 견적 금액 조회 응답 데이터 구성
+def build_price_response(regular_price, people_count, tariff):
+    luxury_price = regular_price + tariff.luxury_extra_price  # 우등 버스 추가 요금 적용
+    return {
+        "recommended_seater": "45인승",  # 추천 좌석
+        "recommended_bus_count": str(get_recommended_bus_count(people_count)),  # 추천 버스 대수
+        "price_list": [
+            {"price": str(regular_price), "bus_type": "일반"},  # 일반 버스 가격
+            {"price": str(luxury_price), "bus_type": "우등"}   # 우등 버스 가격
+        ],
+        "tariff_version": tariff.version,  # 계산에 사용한 요금표 버전
+    }
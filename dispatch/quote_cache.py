@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .pricing import calculate_price
+
+
+# 견적 금액 2단계 캐시 (프로세스 내 LRU -> 공유 캐시(Redis) -> 계산)
+# 키에 요금표 버전이 들어가므로 요금표가 바뀌면 이전 항목은 자동으로 사용되지 않음
+class QuoteCache:
+    KEY_PREFIX = "quote"
+    STATS_KEY_PREFIX = "quote:stats"
+    STATS_FIELDS = ("local_hits", "shared_hits", "misses")
+
+    def __init__(self, max_size=4096, timeout=60 * 60 * 24, stats_flush_every=100):
+        self.max_size = max_size  # 프로세스 내 LRU 최대 항목 수
+        self.timeout = timeout  # 공유 캐시 유지 시간 (초)
+        self.stats_flush_every = stats_flush_every  # 공유 캐시에 통계를 반영하는 주기 (조회 건수)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(self.STATS_FIELDS, 0)  # 프로세스 누적 통계
+        self._pending_stats = dict.fromkeys(self.STATS_FIELDS, 0)  # 공유 캐시에 아직 반영하지 않은 통계
+
+    # 금액에 영향을 주는 값만으로 키 구성
+    @staticmethod
+    def make_key(tariff, distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days):
+        return (
+            tariff.version,
+            distance,
+            bool(is_weekday),
+            bool(is_peak_season),
+            max(days, 1),  # 1일 이하는 추가 요금이 없으므로 같은 키
+            kinds_of_estimate == "편도",
+            bool(is_accompany),
+        )
+
+    def get_price(self, tariff, distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days):
+        key = self.make_key(tariff, distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days)
+
+        # 1단계: 프로세스 내 LRU
+        with self._lock:
+            price = self._entries.get(key)
+            if price is not None:
+                self._entries.move_to_end(key)
+        if price is not None:
+            self._count("local_hits")
+            return price
+
+        # 2단계: 공유 캐시
+        cache_key = f"{self.KEY_PREFIX}:" + ":".join(str(int(value)) for value in key)
+        price = cache.get(cache_key)
+        if price is not None:
+            self._count("shared_hits")
+        else:
+            self._count("misses")
+            price = calculate_price(distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days, tariff)
+            cache.set(cache_key, price, timeout=self.timeout)
+
+        with self._lock:
+            self._entries[key] = price
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return price
+
+    def _count(self, field):
+        with self._lock:
+            self._stats[field] += 1
+            self._pending_stats[field] += 1
+            if sum(self._pending_stats.values()) < self.stats_flush_every:
+                return
+            pending = self._pending_stats
+            self._pending_stats = dict.fromkeys(self.STATS_FIELDS, 0)
+        self._flush(pending)
+
+    # 프로세스별 통계를 공유 캐시에 합산 (모든 워커의 합계 확인용)
+    def _flush(self, pending):
+        for field, value in pending.items():
+            if not value:
+                continue
+            stats_key = f"{self.STATS_KEY_PREFIX}:{field}"
+            cache.add(stats_key, 0, timeout=None)
+            try:
+                cache.incr(stats_key, value)
+            except ValueError:
+                cache.set(stats_key, value, timeout=None)
+
+    def get_stats(self):
+        with self._lock:
+            process_stats = dict(self._stats, size=len(self._entries), max_size=self.max_size)
+        shared_stats = cache.get_many([f"{self.STATS_KEY_PREFIX}:{field}" for field in self.STATS_FIELDS])
+        total_stats = {field: shared_stats.get(f"{self.STATS_KEY_PREFIX}:{field}", 0) for field in self.STATS_FIELDS}
+        return {"process": process_stats, "total": total_stats}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+quote_cache = QuoteCache()
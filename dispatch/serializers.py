@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Estimate, EstimateAddress, Pay, VehicleInfo, VirtualEstimate, Review, ReviewFile
 from django.db import transaction
 from django.conf import settings
+from .outbox import enqueue_estimate_created
 
 # 입력 데이터를 검증하기 위한 Serializer 클래스
 class EstimatePriceSerializer(serializers.Serializer):
@@ -93,6 +94,9 @@ class EstimateSerializer(serializers.ModelSerializer):
                     virtual_estimate=virtual_estimate,
                     **validated_data
                 )
+
+                # RPA-D 알림, TRP 전송은 같은 트랜잭션에서 대기열에 기록하고 run_worker가 전송
+                enqueue_estimate_created(estimate)
                 return estimate
         except Exception as e:
             raise serializers.ValidationError(f"An error occurred: {str(e)}")
@@ -1,3 +1,968 @@
-from django.test import TestCase
+import csv
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.http_client import HttpClient, CircuitOpenError
+from config.idempotency import LOCK_KEY
+from user.models import User
+from firebase.models import FCMToken
+from firebase.send_message import FakeTransport
+from .models import (
+    Estimate, EstimateAddress, Pay, VehicleInfo, VirtualEstimate, OutboxMessage, BatchJobCheckpoint, TrpSyncCheckpoint,
+    TrpSyncFailure,
+    Tariff, Review, ReviewFile,
+)
+from .management.commands.check_finished_estimates import Command as CheckFinishedEstimatesCommand
+from .bulk_import import import_estimates
+from .estimate_cache import get_estimate_list_version
+from .locks import acquire_lease, release_lease, run_exclusive
+from .events import InMemoryEventBackend, publish_estimate_event
+from .views import EstimateEventStreamView, EstimateNotificationScheduler
+from .pricing import CompiledTariff, calculate_price, calculate_prices, get_active_tariff
+from .quote_cache import QuoteCache
+from .outbox import (
+    enqueue_user_notification, enqueue_notification_batch, enqueue_estimates_created, enqueue_deposit_check_digest,
+    process_due_messages, PermanentError, MAX_ATTEMPTS,
+)
+from . import delta_sync, events, trp_sync
+
+
+# 1x1 GIF (리뷰 이미지 업로드용)
+GIF_IMAGE = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+    b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+
+# 견적 신청 요청 데이터
+ESTIMATE_PAYLOAD = {
+    "kinds_of_estimate": "왕복",
+    "departure": {"address": "서울", "latitude": "37.5", "longitude": "127.0"},
+    "arrival": {"address": "부산", "latitude": "35.1", "longitude": "129.0"},
+    "departure_date": "2025-05-01T09:00:00",
+    "return_date": "2025-05-02T18:00:00",
+    "pay": {"price_type": "카드", "depositor_name": "홍길동"},
+    "vehicle_info": {"bus_type": "일반", "bus_count": 1},
+    "virtual_estimate": {"price": 1000000},
+    "distance": 350,
+}
+
+
+# 테스트용 견적 생성 (출발지, 도착지, 결제, 차량, 가견적 포함)
+def create_estimate(user):
+    vehicle_info = VehicleInfo.objects.create(bus_type="일반", bus_count=1)
+    virtual_estimate = VirtualEstimate.objects.create(price=1000000)
+    virtual_estimate.vehicle_types.add(vehicle_info)
+    return Estimate.objects.create(
+        user=user,
+        kinds_of_estimate="왕복",
+        departure=EstimateAddress.objects.create(address="서울", latitude="37.5", longitude="127.0"),
+        arrival=EstimateAddress.objects.create(address="부산", latitude="35.1", longitude="129.0"),
+        departure_date=datetime(2025, 5, 1, 9, 0),
+        return_date=datetime(2025, 5, 2, 18, 0),
+        pay=Pay.objects.create(price_type="카드", depositor_name="홍길동"),
+        virtual_estimate=virtual_estimate,
+        vehicle_info=vehicle_info,
+        distance=350,
+        status="업체 확인중",
+    )
+
+
+# 일괄 견적 금액 계산(배열 연산)이 한 건씩 계산한 결과와 같은지 확인
+class PricingTest(SimpleTestCase):
+    def setUp(self):
+        self.tariff = CompiledTariff(Tariff())
+
+    def test_vectorized_prices_match_single_quotes(self):
+        # 구간 경계 전후 거리 x 편도/왕복 x 평일 x 성수기 x 기사 동행 x 운행 일수
+        distances = [1, 99, 100, 101, 102, 199, 200, 201, 299, 300, 301, 399, 400, 401, 900]
+        cases = list(itertools.product(
+            distances, ["왕복", "편도", "셔틀"], [True, False], [True, False], [True, False], [0, 1, 2, 5]
+        ))
+        expected = [calculate_price(*case, tariff=self.tariff) for case in cases]
+        self.assertEqual(calculate_prices(*zip(*cases), tariff=self.tariff), expected)
+
+
+# 요금표 이전의 고정 요금으로 계산한 금액 (기본 요금표가 같은 결과를 내는지 확인용)
+def legacy_price(distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days):
+    total_price = 500000 if distance <= 100 else 692000
+    total_price += 150000 if distance < 200 else 90000 if distance < 300 else 30000 if distance < 400 else 0
+    if 200 <= distance < 400:
+        total_price += (distance - 200) * 3460
+    elif distance >= 400:
+        total_price += 200 * 3460 + (distance - 400) * 2590
+
+    if kinds_of_estimate == "편도":
+        total_price *= 0.8
+    if is_weekday:
+        total_price += 150000
+    if is_peak_season:
+        total_price += 200000
+    if days > 1:
+        total_price += 692000 * (days - 1)
+    if is_accompany:
+        total_price += 150000
+    return int(total_price)
+
+
+# 요금표: 기본 요금표는 이전 고정 요금과 같고, 사용된 버전은 수정할 수 없음
+class TariffTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_default_tariff_matches_legacy_prices(self):
+        cases = list(itertools.product(range(1, 700, 7), ["왕복", "편도"], [True, False], [True, False], [True, False], [1, 3]))
+        tariff = get_active_tariff()
+        self.assertEqual(tariff.version, 0)
+        self.assertEqual(calculate_prices(*zip(*cases), tariff=tariff), [legacy_price(*case) for case in cases])
+
+    def test_published_tariff_is_immutable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tariff = Tariff.objects.create(version=1, weekday_price=100000, is_active=True)
+        self.assertEqual(get_active_tariff().weekday_price, 100000)
+
+        tariff.weekday_price = 120000
+        with self.assertRaises(ValidationError):
+            tariff.save()
+
+        # 사용 중지는 가능
+        Tariff.objects.filter(pk=tariff.pk).update(weekday_price=100000)
+        tariff.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            tariff.is_active = False
+            tariff.save()
+        self.assertEqual(get_active_tariff().version, 0)
+
+    def test_published_tariff_cannot_be_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tariff = Tariff.objects.create(version=2, weekday_price=100000, is_active=True)
+        with self.assertRaises(ValidationError):
+            tariff.delete()
+        with self.assertRaises(ValidationError):
+            Tariff.objects.filter(version=2).delete()
+
+        # 사용 중지한 뒤에도 같은 버전을 다시 만들 수 없도록 삭제 불가
+        tariff.is_active = False
+        tariff.save()
+        with self.assertRaises(ValidationError):
+            tariff.delete()
+        self.assertTrue(Tariff.objects.filter(version=2).exists())
+
+        # 사용된 적 없는 요금표는 삭제 가능
+        Tariff.objects.create(version=3).delete()
+        self.assertFalse(Tariff.objects.filter(version=3).exists())
+
+    def test_version_zero_is_reserved_for_default(self):
+        with self.assertRaises(ValidationError):
+            Tariff.objects.create(version=0, is_active=True)
+
+    def test_missing_cached_version_falls_back_once(self):
+        cache.set(Tariff.VERSION_CACHE_KEY, 7, timeout=None)
+        self.assertEqual(get_active_tariff().version, 0)
+        with self.assertNumQueries(0):
+            get_active_tariff()
+
+
+# 견적 금액 캐시: 프로세스 내 LRU -> 공유 캐시 -> 계산 순서로 조회
+class QuoteCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.quote_cache = QuoteCache(max_size=2)
+        self.tariff = CompiledTariff(Tariff(version=1))
+
+    def get_price(self, distance, tariff=None):
+        return self.quote_cache.get_price(tariff or self.tariff, distance, "왕복", True, False, False, 1)
+
+    def get_counts(self):
+        stats = self.quote_cache.get_stats()["process"]
+        return stats["local_hits"], stats["shared_hits"], stats["misses"]
+
+    def test_lookup_order(self):
+        price = self.get_price(150)
+        self.assertEqual(self.get_counts(), (0, 0, 1))
+        self.assertEqual(self.get_price(150), price)
+        self.assertEqual(self.get_counts(), (1, 0, 1))
+
+        # 다른 워커 (프로세스 내 LRU가 비어 있음)는 공유 캐시에서 조회
+        self.quote_cache.clear()
+        with mock.patch("dispatch.quote_cache.calculate_price") as calculate:
+            self.assertEqual(self.get_price(150), price)
+        calculate.assert_not_called()
+        self.assertEqual(self.get_counts(), (1, 1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.get_price(100)
+        self.get_price(200)
+        self.get_price(100)
+        self.get_price(300)  # 가장 오래 사용하지 않은 200km 제거
+        self.assertEqual(self.quote_cache.get_stats()["process"]["size"], 2)
+
+        cache.clear()
+        self.get_price(100)
+        self.get_price(200)
+        self.assertEqual(self.get_counts(), (2, 0, 4))
+
+    def test_tariff_version_change_misses(self):
+        self.get_price(150)
+        new_tariff = CompiledTariff(Tariff(version=2, weekday_price=0))
+        self.assertEqual(self.get_price(150, new_tariff), self.get_price(150) - 150000)
+        self.assertEqual(self.get_counts(), (1, 0, 2))
+
+
+# 견적 일괄 신청: 검증에 실패한 행만 제외하고 저장
+class BulkImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.rows = [
+            {**ESTIMATE_PAYLOAD, "distance": 100},
+            {**ESTIMATE_PAYLOAD, "distance": "far"},
+            {**ESTIMATE_PAYLOAD, "distance": 300, "return_date": None},
+        ]
+
+    def assert_imported(self, created_ids):
+        estimates = Estimate.objects.filter(user=self.user).order_by("id")
+        self.assertEqual(list(estimates.values_list("id", flat=True)), created_ids)
+        self.assertEqual([estimate.distance for estimate in estimates], [100, 300])
+        self.assertEqual([estimate.return_date is not None for estimate in estimates], [True, False])
+        self.assertEqual(len({estimate.pay_id for estimate in estimates}), 2)
+        self.assertEqual([estimate.departure.address for estimate in estimates], ["서울", "서울"])
+        self.assertEqual([estimate.virtual_estimate.vehicle_types.get() for estimate in estimates],
+                         [estimate.vehicle_info for estimate in estimates])
+
+    def test_api_partial_failure(self):
+        response = self.client.post("/estimates/bulk", {"estimates": self.rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error["index"] for error in response.data["data"]["errors"]], [1])
+        self.assert_imported(response.data["data"]["created_ids"])
+
+    def test_api_row_limit(self):
+        response = self.client.post("/estimates/bulk", {"estimates": [ESTIMATE_PAYLOAD] * 1001}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Estimate.objects.exists())
+
+    def test_command_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as f:
+            columns = [
+                "kinds_of_estimate", "departure.address", "departure.latitude", "departure.longitude",
+                "arrival.address", "arrival.latitude", "arrival.longitude", "departure_date", "return_date",
+                "pay.price_type", "pay.depositor_name", "vehicle_info.bus_type", "vehicle_info.bus_count",
+                "virtual_estimate.price", "distance",
+            ]
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerow(["왕복", "서울", "37.5", "127.0", "부산", "35.1", "129.0", "2025-05-01T09:00:00",
+                             "2025-05-02T18:00:00", "카드", "홍길동", "일반", "1", "1000000", "100"])
+            writer.writerow(["왕복", "서울", "37.5", "127.0", "부산", "35.1", "129.0", "2025-05-01T09:00:00",
+                             "", "카드", "홍길동", "일반", "1", "1000000", "far"])
+            writer.writerow(["왕복", "서울", "37.5", "127.0", "부산", "35.1", "129.0", "2025-05-01T09:00:00",
+                             "", "카드", "홍길동", "일반", "1", "1000000", "300"])
+        self.addCleanup(os.remove, f.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        list_version = get_estimate_list_version(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_estimates", f.name, username="tester", stdout=stdout, stderr=stderr)
+        self.assertNotEqual(get_estimate_list_version(self.user.id), list_version)
+        self.assertIn("2 estimates imported, 1 rows rejected.", stdout.getvalue())
+        self.assertTrue(stderr.getvalue().startswith("row 1:"))
+        self.assert_imported(list(Estimate.objects.order_by("id").values_list("id", flat=True)))
+
+    # INSERT 결과로 ID를 돌려주지 않는 DB(MySQL 등)에서도 연결 관계가 맞는지 확인
+    def test_backend_without_returned_ids(self):
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False):
+            created_ids, errors = import_estimates(self.user, self.rows)
+        self.assertEqual(len(errors), 1)
+        self.assert_imported(created_ids)
+
+
+# 견적 조회 API의 쿼리 수가 조회 건수와 관계없이 일정한지 확인
+class EstimateQueryCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_page_query_count(self):
+        for _ in range(10):
+            create_estimate(self.user)
+
+        # COUNT + 페이지 조회
+        with self.assertNumQueries(2):
+            response = self.client.get("/estimates")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]["estimates"]), 10)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        create_estimate(self.user)
+        with self.assertNumQueries(2):
+            self.client.get("/estimates")
+
+        for _ in range(9):
+            create_estimate(self.user)
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get("/estimates")
+
+    def test_list_cursor_query_count(self):
+        for _ in range(10):
+            create_estimate(self.user)
+
+        # 페이지 조회만 (COUNT 없음)
+        with self.assertNumQueries(1):
+            response = self.client.get("/estimates", {"pagination": "cursor"})
+        self.assertEqual(len(response.data["data"]["estimates"]), 10)
+
+        # with_count=true인 경우 COUNT 추가
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get("/estimates", {"pagination": "cursor", "with_count": "true"})
+
+    def test_detail_query_count(self):
+        estimate = create_estimate(self.user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/estimates/{estimate.id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["price"], 1000000)
+        self.assertEqual(response.data["data"]["bus_type"], "일반")
+
+
+# 커서 페이징: 페이지를 끝까지 넘기면 모든 견적이 (created_date, id) 순서로 한 번씩 조회됨
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_walk_all_pages(self):
+        estimates = [create_estimate(self.user) for _ in range(25)]
+        # 페이지 경계에 걸치도록 created_date가 같은 견적 묶음 생성
+        base = now()
+        for index, estimate in enumerate(estimates):
+            Estimate.objects.filter(id=estimate.id).update(created_date=base + timedelta(seconds=index // 4))
+
+        ids = []
+        url = "/estimates?pagination=cursor"
+        while url:
+            data = self.client.get(url).data["data"]
+            ids.extend(item["id"] for item in data["estimates"])
+            url = data["next"]
+        self.assertEqual(ids, [estimate.id for estimate in estimates])
+
+
+# 견적 리스트 응답 캐시: 반복 조회는 DB를 거치지 않고, 견적 변경 시 새로 조회
+class EstimateListCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeated_poll_is_served_from_cache(self):
+        create_estimate(self.user)
+        self.client.get("/estimates")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/estimates")
+        self.assertEqual(len(response.data["data"]["estimates"]), 1)
+
+    def test_delete_invalidates_cached_list(self):
+        estimate = create_estimate(self.user)
+        remaining = create_estimate(self.user)
+        self.assertEqual(len(self.client.get("/estimates").data["data"]["estimates"]), 2)
+
+        # 리스트 버전은 커밋 이후 증가
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/estimates/{estimate.id}")
+
+        response = self.client.get("/estimates")
+        self.assertEqual([item["id"] for item in response.data["data"]["estimates"]], [remaining.id])
+
+
+# ETag 조건부 응답: 변경이 없으면 304, 견적이 바뀌면 새 ETag
+class EstimateETagTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_not_modified_until_estimate_changes(self):
+        estimate = create_estimate(self.user)
+        etag = self.client.get(f"/estimates/{estimate.id}").headers["ETag"]
+
+        response = self.client.get(f"/estimates/{estimate.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 같은 사용자의 견적이 변경되면 새로 응답
+        other = create_estimate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/estimates/{other.id}")
+
+        response = self.client.get(f"/estimates/{estimate.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+# 견적 변경 내역: 토큰 이후 변경/삭제된 견적만 반환
+@mock.patch.object(delta_sync, "CHANGES_LAG_SECONDS", 0)
+class EstimateChangesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_changes(self, token=None):
+        data = self.client.get("/estimates/changes", {"since": token} if token else {}).data["data"]
+        return [item["id"] for item in data["changed"]], data["deleted"], data["next_token"]
+
+    def test_token_round_trip(self):
+        estimates = [create_estimate(self.user) for _ in range(3)]
+        changed, deleted, token = self.get_changes()
+        self.assertEqual((changed, deleted), ([estimate.id for estimate in estimates], []))
+        self.assertEqual(self.get_changes(token)[:2], ([], []))
+
+        Estimate.objects.filter(id=estimates[1].id).update(status="예약 완료", updated_at=now())
+        changed, deleted, next_token = self.get_changes(token)
+        self.assertEqual((changed, deleted), ([estimates[1].id], []))
+        self.assertEqual(self.get_changes(next_token)[:2], ([], []))
+
+    def test_deleted_estimate_is_returned_once(self):
+        estimates = [create_estimate(self.user) for _ in range(2)]
+        token = self.get_changes()[2]
+
+        self.client.delete(f"/estimates/{estimates[0].id}")
+        changed, deleted, token = self.get_changes(token)
+        self.assertEqual((changed, deleted), ([], [estimates[0].id]))
+        self.assertEqual(self.get_changes(token)[:2], ([], []))
+
+    def test_paging_over_limit(self):
+        estimates = [create_estimate(self.user) for _ in range(5)]
+        ids, token, pages = [], None, 0
+        while True:
+            changed, _, token, has_more = delta_sync.get_estimate_changes(self.user, token, limit=2)
+            ids.extend(estimate.id for estimate in changed)
+            pages += 1
+            if not has_more:
+                break
+        self.assertEqual((ids, pages), ([estimate.id for estimate in estimates], 3))
+
+    # 최근 수정분은 늦게 커밋되는 트랜잭션을 건너뛰지 않도록 다음 조회에서 전달
+    def test_recent_changes_wait_for_lag_window(self):
+        estimate = create_estimate(self.user)
+        with mock.patch.object(delta_sync, "CHANGES_LAG_SECONDS", 5):
+            self.assertEqual(self.get_changes()[0], [])
+            Estimate.objects.filter(id=estimate.id).update(updated_at=now() - timedelta(seconds=10))
+            self.assertEqual(self.get_changes()[0], [estimate.id])
+
+
+# 견적 상태 이벤트: 구독한 사용자에게만 전달
+class InMemoryEventBackendTest(TestCase):
+    def test_publish_reaches_only_subscribed_user(self):
+        backend = InMemoryEventBackend()
+
+        async def receive():
+            async with backend.subscribe(1) as subscription:
+                backend.publish(2, {"estimate_id": 20})
+                backend.publish(1, {"estimate_id": 10})
+                first = await subscription.get(timeout=1)
+                second = await subscription.get(timeout=0.01)
+            return first, second
+
+        self.assertEqual(async_to_sync(receive)(), ({"estimate_id": 10}, None))
+
+
+# 견적 상태 실시간 전송: 인증되지 않은 요청은 401, 커밋된 상태 변경은 스트림으로 전달
+@mock.patch.object(events, "_backend", InMemoryEventBackend())
+class EstimateEventStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.factory = RequestFactory()
+
+    def test_rejects_missing_token(self):
+        request = self.factory.get("/estimates/events")
+        response = async_to_sync(EstimateEventStreamView.as_view())(request)
+        self.assertEqual(response.status_code, 401)
+
+    def test_status_change_reaches_stream(self):
+        estimate = create_estimate(self.user)
+        request = self.factory.get("/estimates/events", {"token": str(AccessToken.for_user(self.user))})
+
+        def change_status():
+            with self.captureOnCommitCallbacks(execute=True):
+                estimate.status = "예약 완료"
+                publish_estimate_event(estimate)
+
+        async def read():
+            response = await EstimateEventStreamView.as_view()(request)
+            stream = aiter(response.streaming_content)
+            chunks = [await anext(stream)]
+            await sync_to_async(change_status)()
+            chunks.append(await anext(stream))
+            await stream.aclose()
+            return response, chunks
+
+        response, chunks = async_to_sync(read)()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(chunks[0], b"retry: 3000\n\n")
+        event_type, data = chunks[1].decode().strip().split("\n")
+        self.assertEqual(event_type, "event: estimate_status")
+        self.assertEqual(json.loads(data.removeprefix("data: "))["status"], "예약 완료")
+
+
+# 스케줄러 lease lock: 같은 작업은 한 인스턴스만 실행, 만료된 lease는 다시 획득 가능
+class LeaseLockTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_second_acquire_is_refused(self):
+        token = acquire_lease("job:10", timeout=60)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_lease("job:10", timeout=60))
+
+        # 다른 토큰으로는 해제되지 않음
+        release_lease("job:10", "other")
+        self.assertIsNone(acquire_lease("job:10", timeout=60))
+        release_lease("job:10", token)
+        self.assertIsNotNone(acquire_lease("job:10", timeout=60))
+
+    def test_run_exclusive_runs_once_per_slot(self):
+        calls = []
+        self.assertTrue(run_exclusive("job:11", lambda: calls.append(1), timeout=60))
+        with mock.patch("builtins.print"):
+            self.assertFalse(run_exclusive("job:11", lambda: calls.append(2), timeout=60))
+        self.assertEqual(calls, [1])
+
+    def test_expired_lease_can_be_taken_again(self):
+        self.assertIsNotNone(acquire_lease("job:12", timeout=60))
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNotNone(acquire_lease("job:12", timeout=60))
+
+
+# 알림 작업 대기열: 일시적 오류는 재시도, 재시도할 수 없는 오류는 실패(dead letter) 처리
+class OutboxWorkerTest(TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        patcher = mock.patch("firebase.send_message.get_transport", return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        FCMToken.objects.create(user=self.user, token="device-token")
+
+    def test_transient_error_is_retried(self):
+        enqueue_user_notification(self.user.id, "예약 완료 알림", "예약이 완료되었습니다.")
+        self.transport.errors["device-token"] = "UNAVAILABLE"
+
+        self.assertEqual(process_due_messages(), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("대기", 1))
+        self.assertGreater(message.next_attempt_at, now())
+
+        # 재시도 시간이 되면 다시 전송
+        self.transport.errors.clear()
+        OutboxMessage.objects.update(next_attempt_at=now())
+        self.assertEqual(process_due_messages(), (1, 0))
+        self.assertEqual(OutboxMessage.objects.get().status, "완료")
+        self.assertEqual([message.token for message in self.transport.sent], ["device-token", "device-token"])
+
+    def test_permanent_error_is_dead_lettered(self):
+        enqueue_user_notification(self.user.id, "예약 완료 알림", "예약이 완료되었습니다.")
+        self.transport.errors["device-token"] = "UNREGISTERED"
+
+        self.assertEqual(process_due_messages(), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("실패", 1))
+
+    def test_open_circuit_does_not_use_attempts(self):
+        enqueue_user_notification(self.user.id, "예약 완료 알림", "예약이 완료되었습니다.")
+        with mock.patch("dispatch.outbox.deliver", side_effect=CircuitOpenError("blocked")):
+            for _ in range(MAX_ATTEMPTS + 2):
+                OutboxMessage.objects.update(next_attempt_at=now())
+                self.assertEqual(process_due_messages(), (0, 1))
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("대기", 0))
+        OutboxMessage.objects.update(next_attempt_at=now())
+        self.assertEqual(process_due_messages(), (1, 0))
+
+    def test_deposit_reminders_are_queued(self):
+        estimate = create_estimate(self.user)
+        Estimate.objects.filter(id=estimate.id).update(status="계약금 입금 대기")
+
+        with mock.patch("builtins.print"):
+            EstimateNotificationScheduler.send_notifications_for_pending_estimates()
+        self.assertEqual(self.transport.sent, [])
+        self.assertEqual(sorted(OutboxMessage.objects.values_list("kind", flat=True)), ["admin_digest", "fcm_batch"])
+
+        with mock.patch("dispatch.outbox.post"), mock.patch("builtins.print"):
+            self.assertEqual(process_due_messages(), (2, 0))
+        self.assertEqual([message.token for message in self.transport.sent], ["device-token"])
+
+    def test_admin_digest_is_split_into_pages(self):
+        estimates = [create_estimate(self.user) for _ in range(5)]
+        Estimate.objects.update(status="계약금 입금 대기")
+
+        with mock.patch.object(EstimateNotificationScheduler, "DIGEST_MAX_IDS", 2), mock.patch("builtins.print"):
+            EstimateNotificationScheduler.send_notifications_for_pending_estimates()
+        digests = [message.payload for message in OutboxMessage.objects.filter(kind="admin_digest").order_by("id")]
+        ids = [estimate.id for estimate in estimates]
+        self.assertEqual([digest["notification"]["estimate_ids"] for digest in digests], [ids[:2], ids[2:4], ids[4:]])
+        self.assertEqual([len(digest["fallback"]) for digest in digests], [2, 2, 1])
+        self.assertIn("5건", digests[0]["notification"]["content"])
+        self.assertIn("(3/3)", digests[2]["notification"]["content"])
+
+    def test_rejected_admin_digest_falls_back_to_notifications(self):
+        enqueue_deposit_check_digest([11, 12], page_size=200)
+        posted = []
+
+        def post(url, payload, endpoint):
+            if endpoint == "admin_digest":
+                raise PermanentError("400 - too long")
+            posted.append(payload["content"])
+
+        with mock.patch("dispatch.outbox.post", post), mock.patch("builtins.print"):
+            self.assertEqual(process_due_messages(), (1, 0))
+            self.assertEqual(OutboxMessage.objects.filter(kind="rpad_notification", status="대기").count(), 2)
+            self.assertEqual(process_due_messages(), (2, 0))
+        self.assertEqual(posted, ["견적 11의 계약금 입금을 확인해주세요.", "견적 12의 계약금 입금을 확인해주세요."])
+
+    def test_batch_retries_only_failed_notifications(self):
+        other = User.objects.create(username="other", phone_number="01087654321")
+        FCMToken.objects.create(user=other, token="other-token")
+        enqueue_notification_batch([(self.user.id, "제목", "내용"), (other.id, "제목", "내용")])
+        self.transport.errors["other-token"] = "UNAVAILABLE"
+
+        with mock.patch("builtins.print"):
+            self.assertEqual(process_due_messages(), (0, 1))
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.payload), ("대기", {"notifications": [[other.id, "제목", "내용"]]}))
+
+            self.transport.errors.clear()
+            OutboxMessage.objects.update(next_attempt_at=now())
+            self.assertEqual(process_due_messages(), (1, 0))
+        self.assertEqual([message.token for message in self.transport.sent], ["device-token", "other-token", "other-token"])
+
+
+# 배치 작업: 중단된 뒤 다시 실행하면 저장된 진행 위치부터 이어서 처리
+class BatchJobResumeTest(TestCase):
+    def test_resume_after_interrupted_run(self):
+        user = User.objects.create(username="tester", phone_number="01012345678")
+        estimates = [create_estimate(user) for _ in range(4)]
+        Estimate.objects.update(status="예약 완료")
+
+        process_chunk = CheckFinishedEstimatesCommand.process_chunk
+        calls = []
+
+        # 두 번째 청크에서 중단
+        def interrupted(command, queryset, options):
+            calls.append(queryset)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            return process_chunk(command, queryset, options)
+
+        with mock.patch.object(CheckFinishedEstimatesCommand, "process_chunk", interrupted):
+            with self.assertRaises(RuntimeError):
+                call_command("check_finished_estimates", chunk_size=2, stdout=StringIO())
+        checkpoint = BatchJobCheckpoint.objects.get()
+        self.assertEqual((checkpoint.last_id, checkpoint.status), (estimates[1].id, "진행중"))
+
+        # 다시 실행하면 남은 청크만 처리
+        calls.clear()
+
+        def counted(command, queryset, options):
+            calls.append(queryset)
+            return process_chunk(command, queryset, options)
+
+        with mock.patch.object(CheckFinishedEstimatesCommand, "process_chunk", counted):
+            call_command("check_finished_estimates", chunk_size=2, stdout=StringIO())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Estimate.objects.filter(is_finished=True).count(), 4)
+        self.assertEqual(BatchJobCheckpoint.objects.get().status, "완료")
+
+
+# 테스트용 외부 서버: /slow는 지연 후 응답, /error는 500, 그 외는 201
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.3
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/slow":
+            time.sleep(self.delay)
+        self.send_response(500 if self.path == "/error" else 201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+# 외부 서버 HTTP 클라이언트: 타임아웃, circuit breaker, 지연 시간 히스토그램
+class HttpClientTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_read_timeout_opens_circuit_and_fails_fast(self):
+        client = HttpClient(read_timeout=0.1, failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with self.assertRaises(requests.Timeout):
+                client.post(f"{self.base_url}/slow", json={})
+
+        # 차단된 호스트는 요청하지 않고 바로 실패
+        started = time.perf_counter()
+        with self.assertRaises(CircuitOpenError):
+            client.post(f"{self.base_url}/ok", json={})
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(client.get_stats()["hosts"][self.base_url], "open")
+
+    def test_half_open_trial_closes_circuit(self):
+        client = HttpClient(failure_threshold=1, reset_timeout=0.1)
+        self.assertEqual(client.post(f"{self.base_url}/error", json={}).status_code, 500)
+        with self.assertRaises(CircuitOpenError):
+            client.post(f"{self.base_url}/ok", json={})
+
+        time.sleep(0.15)
+        self.assertEqual(client.post(f"{self.base_url}/ok", json={}).status_code, 201)
+        self.assertEqual(client.get_stats()["hosts"][self.base_url], "closed")
+
+    def test_unexpected_error_in_half_open_trial_allows_next_trial(self):
+        client = HttpClient(failure_threshold=1, reset_timeout=0.1)
+        client.post(f"{self.base_url}/error", json={})
+        time.sleep(0.15)
+
+        session, _ = client._get_session(self.base_url)
+        with mock.patch.object(session, "request", side_effect=RuntimeError("bug")):
+            with self.assertRaises(RuntimeError):
+                client.post(f"{self.base_url}/ok", json={})
+        self.assertEqual(client.post(f"{self.base_url}/ok", json={}).status_code, 201)
+        self.assertEqual(client.get_stats()["hosts"][self.base_url], "closed")
+
+    def test_latency_histogram_per_endpoint(self):
+        client = HttpClient()
+        client.post(f"{self.base_url}/slow", endpoint="slow", json={})
+        client.post(f"{self.base_url}/ok", endpoint="ok", json={})
+
+        endpoints = client.get_stats()["endpoints"]
+        self.assertEqual(endpoints["slow"]["count"], 1)
+        self.assertEqual(endpoints["slow"]["p95"], 0.5)
+        self.assertLessEqual(endpoints["ok"]["p95"], 0.1)
+
+
+# Idempotency-Key: 재시도는 저장된 응답 반환, 같은 키로 다른 요청은 거부
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = dict(ESTIMATE_PAYLOAD)
+
+    def test_retry_returns_stored_response(self):
+        first = self.client.post("/estimates", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(first.status_code, 201, first.data)
+
+        with self.assertNumQueries(0):
+            retry = self.client.post("/estimates", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Estimate.objects.count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_concurrent_duplicate_gets_conflict(self):
+        lock_key = LOCK_KEY.format(user_id=self.user.id, path="/estimates", key="retry-3")
+        cache.add(lock_key, "other-request")  # 같은 키의 요청이 처리 중
+        response = self.client.post("/estimates", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="retry-3")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertFalse(Estimate.objects.exists())
+
+    # 처리가 LOCK_TIMEOUT보다 오래 걸려 다른 요청이 잠금을 얻은 경우 그 잠금을 지우지 않음
+    def test_expired_lock_taken_by_another_request_is_kept(self):
+        lock_key = LOCK_KEY.format(user_id=self.user.id, path="/estimates", key="retry-4")
+
+        def save(**kwargs):
+            cache.set(lock_key, "other-request")
+            return create_estimate(self.user)
+
+        with mock.patch("dispatch.views.EstimateSerializer.save", side_effect=save):
+            response = self.client.post("/estimates", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="retry-4")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(cache.get(lock_key), "other-request")
+
+    def test_multipart_review_retry_is_replayed(self):
+        estimate = create_estimate(self.user)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        def post_review():
+            image = SimpleUploadedFile("bus.gif", GIF_IMAGE, content_type="image/gif")
+            return self.client.post(
+                "/estimates/review", {"estimate": estimate.id, "star": 5, "detail": "좋아요", "files": [image]},
+                format="multipart", HTTP_IDEMPOTENCY_KEY="review-1",
+            )
+
+        with override_settings(MEDIA_ROOT=media_root):
+            first = post_review()
+            self.assertEqual(first.status_code, 201, first.data)
+            retry = post_review()
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual((Review.objects.count(), ReviewFile.objects.count()), (1, 1))
+
+    def test_same_key_with_different_body_is_rejected(self):
+        self.client.post("/estimates", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="retry-2")
+        response = self.client.post(
+            "/estimates", {**self.payload, "distance": 10}, format="json", HTTP_IDEMPOTENCY_KEY="retry-2"
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Estimate.objects.count(), 1)
+
+
+# TRP 동기화: 처음에는 전체 필드, 이후에는 바뀐 필드만 전송하고 실패하면 진행 위치 유지
+@mock.patch.object(trp_sync, "SYNC_LAG_SECONDS", 0)
+class TrpSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.estimates = [create_estimate(self.user) for _ in range(3)]
+        self.pushed = []
+
+    def push(self, items):
+        self.pushed.append(items)
+        return {item["estimate_id"] for item in items}
+
+    def test_sends_only_changed_fields(self):
+        with mock.patch.object(trp_sync, "push_items", self.push):
+            trp_sync.sync_changed_estimates(batch_size=2)
+            self.assertEqual([[item["op"] for item in items] for items in self.pushed], [["upsert"] * 2, ["upsert"]])
+
+            self.pushed.clear()
+            Estimate.objects.filter(id=self.estimates[1].id).update(distance=500, updated_at=now())
+            stats = trp_sync.sync_changed_estimates(batch_size=2)
+        self.assertEqual(self.pushed, [[{"op": "update", "estimate_id": self.estimates[1].id, "fields": {"distance": 500}}]])
+        self.assertEqual((stats["estimates"], stats["fields"]), (1, 1))
+
+    def test_failed_push_keeps_checkpoint(self):
+        with mock.patch.object(trp_sync, "push_items", side_effect=trp_sync.TrpSyncError("down")):
+            call_command("sync_trp", stdout=StringIO())
+        self.assertIsNone(TrpSyncCheckpoint.objects.get().last_updated_at)
+
+        with mock.patch.object(trp_sync, "push_items", self.push):
+            call_command("sync_trp", stdout=StringIO())
+        self.assertEqual(TrpSyncCheckpoint.objects.get().last_id, self.estimates[-1].id)
+
+    def test_rejected_estimate_is_recorded_and_skipped(self):
+        bad_id = self.estimates[1].id
+
+        def push(items):
+            if any(item["estimate_id"] == bad_id for item in items):
+                raise trp_sync.TrpRejectedError("400 - invalid")
+            return self.push(items)
+
+        with mock.patch.object(trp_sync, "push_items", push):
+            stats = trp_sync.sync_changed_estimates(batch_size=3)
+        self.assertEqual((stats["estimates"], stats["failed"]), (2, 1))
+        self.assertEqual(TrpSyncCheckpoint.objects.get().last_id, self.estimates[-1].id)
+        self.assertEqual(TrpSyncFailure.objects.get().estimate_id, bad_id)
+
+        # 수정된 견적이 확인되면 실패 기록 삭제
+        Estimate.objects.filter(id=bad_id).update(distance=500, updated_at=now())
+        with mock.patch.object(trp_sync, "push_items", self.push):
+            trp_sync.sync_changed_estimates(batch_size=3)
+        self.assertFalse(TrpSyncFailure.objects.exists())
+
+    def test_unacknowledged_estimate_is_recorded_and_skipped(self):
+        def push(items):
+            return self.push(items) - {self.estimates[0].id}
+
+        with mock.patch.object(trp_sync, "push_items", push):
+            stats = trp_sync.sync_changed_estimates(batch_size=3)
+        self.assertEqual((stats["estimates"], stats["failed"]), (2, 1))
+        self.assertEqual(TrpSyncCheckpoint.objects.get().last_id, self.estimates[-1].id)
+        self.assertEqual(TrpSyncFailure.objects.get().estimate_id, self.estimates[0].id)
+
+    def test_outbox_skips_trp_when_batch_sync_enabled(self):
+        OutboxMessage.objects.all().delete()
+        with override_settings(TRP_BATCH_SYNC_ENABLED=True):
+            enqueue_estimates_created(self.estimates)
+        self.assertEqual(set(OutboxMessage.objects.values_list("kind", flat=True)), {"rpad_notification"})
+
+        enqueue_estimates_created(self.estimates)
+        self.assertEqual(OutboxMessage.objects.filter(kind="trp_estimate").count(), 3)
+
+
+# 견적 상태 일괄 변경: 항목별 결과 반환, 쿼리 수는 항목 수와 관계없이 일정
+class EstimateStatusBatchUpdateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.estimates = [create_estimate(self.user) for _ in range(5)]
+        self.client = APIClient(REMOTE_ADDR="127.0.0.1")
+
+    def confirm(self, items):
+        with mock.patch("dispatch.views.EstimateStatusUpdateView.ALLOWED_IPS", ["127.0.0.1"]):
+            return self.client.patch("/estimates/confirm/batch", {"items": items}, format="json")
+
+    def test_batch_update(self):
+        items = [{"estimate_id": estimate.id, "status": "예약 완료"} for estimate in self.estimates[:2]]
+        with self.assertNumQueries(5):  # savepoint 생성/해제, 조회, bulk_update, 알림 기록
+            self.confirm(items)
+
+        items = [{"estimate_id": estimate.id, "status": "예약 완료"} for estimate in self.estimates[2:]]
+        items += [{"estimate_id": 0, "status": "예약 완료"}, {"status": "예약 완료"}]
+        with self.assertNumQueries(5):
+            response = self.confirm(items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["updated_count"], 3)
+        self.assertEqual([result["result"] for result in response.data["data"]["results"]], ["true"] * 3 + ["false"] * 2)
+        self.assertEqual(Estimate.objects.filter(status="예약 완료").count(), 5)
+        self.assertEqual(OutboxMessage.objects.filter(kind="fcm_notification").count(), 5)
+
+    def test_reconfirm_does_not_notify_again(self):
+        items = [{"estimate_id": self.estimates[0].id, "status": "예약 완료"}]
+        self.confirm(items)
+        response = self.confirm(items)
+        self.assertEqual(response.data["data"]["updated_count"], 1)
+        self.assertEqual(OutboxMessage.objects.filter(kind="fcm_notification").count(), 1)
+
+    def test_too_long_status_has_own_message(self):
+        response = self.confirm([{"estimate_id": self.estimates[0].id, "status": "가" * 1000}, {"estimate_id": self.estimates[1].id}])
+        messages = [result["message"] for result in response.data["data"]["results"]]
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("자 이하여야 합니다.", messages[0])
+        self.assertEqual(messages[1], "status가 요청에 포함되지 않았습니다.")
@@ -0,0 +1,189 @@
+from datetime import timedelta
+
+from django.utils.timezone import now
+
+from config.http_client import http_client
+from my_settings import DEV4_SERVER
+from .delta_sync import after_position
+from .models import Estimate, TrpSyncState, TrpSyncCheckpoint, TrpSyncFailure
+from .outbox import build_trp_payload
+
+TRP_SYNC_URL = f"{DEV4_SERVER}/dispatch/estimates/sync"  # TRP 견적 일괄 동기화 API
+SYNC_BATCH_SIZE = 200  # 요청 하나에 담을 최대 견적 수
+SYNC_LAG_SECONDS = 5  # 커밋이 늦은 트랜잭션을 건너뛰지 않도록 최근 수정분은 다음 실행에서 전송
+SYNC_INTERVAL_SECONDS = 60  # run_scheduler의 sync_trp 실행 주기
+CHECKPOINT_NAME = "trp"
+
+
+# TRP 동기화 실패 (연결 실패, 차단, 5xx 응답) - 진행 위치는 그대로 두고 다음 실행에서 다시 전송
+class TrpSyncError(Exception):
+    pass
+
+
+# TRP가 요청을 거부 (4xx 응답) - 다시 보내도 같은 결과이므로 거부된 항목을 찾아 실패로 기록
+class TrpRejectedError(Exception):
+    pass
+
+
+# 이전에 확인된 데이터와 비교해 전송할 항목 생성 (바뀐 필드가 없으면 None)
+# - 처음 전송하거나 full=True: 전체 필드 (op=upsert)
+# - 이후: 바뀐 필드만 (op=update)
+def build_sync_item(estimate, full=False):
+    payload = build_trp_payload(estimate)
+    state = getattr(estimate, "trp_sync_state", None)
+    if state is None or full:
+        return payload, {"op": "upsert", "estimate_id": estimate.id, "fields": payload}
+
+    changes = {field: value for field, value in payload.items() if state.payload.get(field) != value}
+    if not changes:
+        return payload, None
+    return payload, {"op": "update", "estimate_id": estimate.id, "fields": changes}
+
+
+# 항목을 TRP로 한 번에 전송하고 TRP가 확인한 견적 ID 반환
+# TRP 응답: {"acknowledged": [견적 ID, ...]} (없으면 전체 확인으로 처리)
+def push_items(items):
+    try:
+        response = http_client.post(TRP_SYNC_URL, endpoint="trp_sync", json={"items": items})
+    except Exception as e:
+        raise TrpSyncError(str(e)) from e
+    if 400 <= response.status_code < 500:
+        raise TrpRejectedError(f"{response.status_code} - {response.text}")
+    if not 200 <= response.status_code < 300:
+        raise TrpSyncError(f"{response.status_code} - {response.text}")
+
+    try:
+        acknowledged = response.json().get("acknowledged")
+    except ValueError:
+        acknowledged = None
+    if acknowledged is None:
+        return {item["estimate_id"] for item in items}
+    return set(acknowledged)
+
+
+# 항목 전송 후 (확인된 견적 ID, {거부된 견적 ID: 사유}) 반환
+# 묶음이 거부되면 반으로 나눠 다시 전송해 거부된 항목만 골라냄
+def push_and_isolate(items):
+    try:
+        return push_items(items), {}
+    except TrpRejectedError as e:
+        if len(items) == 1:
+            return set(), {items[0]["estimate_id"]: str(e)}
+
+    middle = len(items) // 2
+    acknowledged, rejected = push_and_isolate(items[:middle])
+    more_acknowledged, more_rejected = push_and_isolate(items[middle:])
+    return acknowledged | more_acknowledged, {**rejected, **more_rejected}
+
+
+# 확인된 견적 데이터 저장, 이전 실패 기록 삭제
+def save_states(payloads, estimate_ids):
+    synced_at = now()
+    TrpSyncState.objects.bulk_create(
+        [
+            TrpSyncState(estimate_id=estimate_id, payload=payloads[estimate_id], synced_at=synced_at)
+            for estimate_id in estimate_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["estimate"],
+        update_fields=["payload", "synced_at"],
+    )
+    TrpSyncFailure.objects.filter(estimate_id__in=estimate_ids).delete()
+
+
+# 거부되거나 확인되지 않은 항목 기록 (확인된 데이터는 그대로 두어 다음 전송에서 다시 비교)
+def save_failures(items, errors):
+    failed_at = now()
+    TrpSyncFailure.objects.bulk_create(
+        [
+            TrpSyncFailure(estimate_id=item["estimate_id"], item=item, error=errors[item["estimate_id"]], failed_at=failed_at)
+            for item in items
+            if item["estimate_id"] in errors
+        ],
+        update_conflicts=True,
+        unique_fields=["estimate"],
+        update_fields=["item", "error", "failed_at"],
+    )
+
+
+def _get_estimates(queryset):
+    return queryset.select_related(
+        "departure", "arrival", "vehicle_info", "user", "virtual_estimate", "pay", "trp_sync_state"
+    )
+
+
+# 견적 묶음 전송 후 (확인된 견적, 실패한 견적, 전송 항목 수, 전송 필드 수, 전체 필드 수) 반환
+# TRP 장애(TrpSyncError)는 그대로 전달, 거부되거나 확인되지 않은 견적은 실패로 기록
+def sync_estimates(estimates, full=False):
+    payloads = {}
+    items = []
+    for estimate in estimates:
+        payload, item = build_sync_item(estimate, full)
+        payloads[estimate.id] = payload
+        if item is not None:
+            items.append(item)
+
+    # 바뀐 필드가 없는 견적은 전송 없이 확인된 것으로 처리
+    acknowledged = set(payloads) - {item["estimate_id"] for item in items}
+    errors = {}
+    if items:
+        pushed, errors = push_and_isolate(items)
+        acknowledged |= pushed & set(payloads)
+        for item in items:
+            if item["estimate_id"] not in acknowledged and item["estimate_id"] not in errors:
+                errors[item["estimate_id"]] = "TRP가 확인하지 않았습니다."
+    save_states(payloads, acknowledged)
+    save_failures(items, errors)
+
+    field_count = sum(len(item["fields"]) for item in items)
+    full_field_count = sum(len(payload) for payload in payloads.values())
+    return acknowledged, set(errors), len(items), field_count, full_field_count
+
+
+# 마지막 확인 이후 수정된 견적을 batch_size 단위로 전송하고 묶음마다 진행 위치 저장
+# 실패한 견적은 TrpSyncFailure에 기록하고 넘어감 (한 견적 때문에 이후 동기화가 멈추지 않도록)
+# TRP 장애 시 TrpSyncError (이미 처리된 묶음의 진행 위치는 저장됨)
+def sync_changed_estimates(batch_size=SYNC_BATCH_SIZE):
+    checkpoint, _ = TrpSyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    position = (checkpoint.last_updated_at, checkpoint.last_id) if checkpoint.last_updated_at else None
+    queryset = Estimate.objects.filter(updated_at__lte=now() - timedelta(seconds=SYNC_LAG_SECONDS))
+    stats = {"estimates": 0, "failed": 0, "items": 0, "fields": 0, "full_fields": 0}
+
+    while True:
+        estimates = list(_get_estimates(after_position(queryset, "updated_at", position))[:batch_size])
+        if not estimates:
+            break
+
+        acknowledged, failed, item_count, field_count, full_field_count = sync_estimates(estimates)
+        stats["estimates"] += len(acknowledged)
+        stats["failed"] += len(failed)
+        stats["items"] += item_count
+        stats["fields"] += field_count
+        stats["full_fields"] += full_field_count
+
+        position = (estimates[-1].updated_at, estimates[-1].id)
+        checkpoint.last_updated_at, checkpoint.last_id = position
+        checkpoint.save(update_fields=["last_updated_at", "last_id", "updated_at"])
+
+        if len(estimates) < batch_size:
+            break
+    return stats
+
+
+# 전체 견적을 ID 순서로 batch_size 단위로 전체 필드 전송 (TRP와 데이터가 어긋난 경우 복구, 실패한 견적 재전송)
+def reconcile_all_estimates(batch_size=SYNC_BATCH_SIZE):
+    stats = {"estimates": 0, "failed": 0, "items": 0, "fields": 0, "full_fields": 0}
+    last_id = 0
+    while True:
+        estimates = list(_get_estimates(Estimate.objects.filter(id__gt=last_id).order_by("id"))[:batch_size])
+        if not estimates:
+            break
+        last_id = estimates[-1].id
+
+        acknowledged, failed, item_count, field_count, full_field_count = sync_estimates(estimates, full=True)
+        stats["estimates"] += len(acknowledged)
+        stats["failed"] += len(failed)
+        stats["items"] += item_count
+        stats["fields"] += field_count
+        stats["full_fields"] += full_field_count
+    return stats
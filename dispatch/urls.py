@@ -3,9 +3,15 @@ from . import views
 
 urlpatterns = [
     path('estimates/approximate-price', views.EstimatePriceView().as_view(), name='approximate-price'), # 견적 금액 리스트 조회
+    path('estimates/approximate-price/batch', views.EstimatePriceBatchView().as_view(), name='approximate-price-batch'), # 견적 금액 일괄 조회
+    path('estimates/approximate-price/cache-stats', views.EstimatePriceCacheStatsView().as_view()), # 견적 금액 캐시 통계 조회
     path('estimates', views.EstimateView().as_view()), # 견적 신청(POST), 견적 리스트 조회(GET)
+    path('estimates/bulk', views.EstimateBulkImportView().as_view()), # 견적 일괄 신청(POST)
+    path('estimates/changes', views.EstimateChangesView().as_view()), # 견적 변경 내역 조회(GET)
+    path('estimates/events', views.EstimateEventStreamView.as_view()), # 견적 상태 실시간 전송(SSE)
     path('estimates/<int:estimate_id>', views.EstimateDetailView().as_view()), # 견적 상세 조회(GET), 견적 삭제(DELETE) # trp에서 받은 정보에 대한 견적 수정(PATCH)
     path('estimates/confirm', views.EstimateStatusUpdateView().as_view()), # 견적 예약 확정(PATCH)
+    path('estimates/confirm/batch', views.EstimateStatusBatchUpdateView().as_view()), # 견적 예약 일괄 확정(PATCH)
 
     path('estimates/review', views.ReviewView().as_view()), # 리뷰 등록(POST)
     path('estimates/reviews', views.ReviewListView().as_view()), # 리뷰 조회
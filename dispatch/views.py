@@ -1,223 +1,129 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from datetime import datetime
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from .serializers import EstimateSerializer, EstimateDetailSerializer, EstimateListSerializer, EstimatePriceSerializer, ReviewSerializer, ReviewListSerializer, EstimateUpdateSerializer
 from rest_framework import status
-from .models import Estimate, Review
+from .models import Estimate, Review, DeletedEstimate
+from .quote_cache import quote_cache
+from .bulk_import import import_estimates
+from .delta_sync import get_estimate_changes
+from .events import get_event_backend, publish_estimate_event
+from .estimate_cache import get_estimate_list_cache_key, bump_estimate_list_version, LIST_PAGE_TIMEOUT, get_estimate_list_etag, get_estimate_detail_etag, get_estimates_version
+from .pricing import calculate_prices, get_quote_conditions, build_price_response, get_active_tariff
 from django.db import transaction
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.core.paginator import Paginator
 from urllib.parse import urlencode
 from rest_framework.generics import ListAPIView
-from config.pagination import Pagination
-import requests
-from apscheduler.schedulers.background import BackgroundScheduler
-from firebase.models import FCMToken
-from firebase.send_message import send_notification
-from my_settings import ALLOWED_HOSTS, DEV4_SERVER , DEV_SERVER
-from django.http import HttpResponseForbidden
+from config.pagination import Pagination, KeysetPagination
+from config.idempotency import idempotent
+from .locks import run_exclusive
+from .outbox import (
+    enqueue_user_notification, enqueue_user_notifications, enqueue_notification_batch, enqueue_deposit_check_digest,
+)
+from django.utils.timezone import now
+from my_settings import ALLOWED_HOSTS
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+import json
+from collections import Counter
 
 # 견적 금액 조회
 class EstimatePriceView(APIView):
     permission_classes = [AllowAny]  
 
-    # 금액을 계산하는 메서드
-    def calculate_price(self, distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days):
-        BASIC_PRICE_UNDER_100KM = 500000  # 100km 이하의 기본 요금
-        BASIC_PRICE_OVER_100KM = 692000   # 100km 초과 시 기본 요금
-        WAITING_TIME_PRICES = [150000, 90000, 30000, 0]  # 대기 시간에 따른 운임 비용 (구간별 0~400km)
-        PRICE_PER_KM_200_TO_400 = 3460  # 200~400km 구간의 km당 요금
-        PRICE_PER_KM_OVER_400 = 2590    # 400km 초과 구간의 km당 요금
-        ADDITIONAL_CHARGES = {
-            "weekday": 150000,         # 평일 추가 요금
-            "peak_season": 200000,     # 성수기 추가 요금
-            "daily_extra": 692000,     # 하루 추가 시 추가 요금
-            "driver": 150000,          # 기사 동행 추가 요금
-            "one_way_discount": 0.8    # 편도 운행 시 할인율 (20% 할인)
-        }
-
-        # 대기 시간 비용을 계산
-        def get_waiting_time_price(distance):
-            if distance < 200:
-                return WAITING_TIME_PRICES[0]
-            elif distance < 300:
-                return WAITING_TIME_PRICES[1]
-            elif distance < 400:
-                return WAITING_TIME_PRICES[2]
-            else:
-                return WAITING_TIME_PRICES[3]
-
-        # 거리 초과 비용을 계산
-        def get_distance_price(distance):
-            if distance < 200:
-                return 0
-            elif distance < 400:
-                return (distance - 200) * PRICE_PER_KM_200_TO_400
-            else:
-                return (200 * PRICE_PER_KM_200_TO_400) + (distance - 400) * PRICE_PER_KM_OVER_400
-
-        # 기본 요금 결정
-        basic_price = BASIC_PRICE_UNDER_100KM if distance <= 100 else BASIC_PRICE_OVER_100KM
-        waiting_time_price = get_waiting_time_price(distance)  # 대기 시간 비용 계산
-        distance_price = get_distance_price(distance)  # 거리 초과 비용 계산
-
-        # 총 비용 계산
-        total_price = basic_price + waiting_time_price + distance_price
-
-        # 조건에 따른 요금 조정
-        if kinds_of_estimate == "편도":
-            total_price *= ADDITIONAL_CHARGES["one_way_discount"]  # 편도 할인 적용
-        if is_weekday:
-            total_price += ADDITIONAL_CHARGES["weekday"]  # 평일 요금 추가
-        if is_peak_season:
-            total_price += ADDITIONAL_CHARGES["peak_season"]  # 성수기 요금 추가
-        if days > 1:
-            total_price += ADDITIONAL_CHARGES["daily_extra"] * (days - 1)  # 추가 일수에 대한 요금 추가
-        if is_accompany:
-            total_price += ADDITIONAL_CHARGES["driver"]  # 기사 동행 요금 추가
-
-        return int(total_price)  # 최종 요금 반환
-
     def post(self, request):
         serializer = EstimatePriceSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)  
         data = serializer.validated_data
-
-        # 입력 데이터
-        distance = data["distance"]  # 거리 정보
-        departure_date = data["departure_date"]  # 출발 날짜
-        return_date = data.get("return_date") or ""  # 복귀 날짜 (없으면 빈 문자열)
-        kinds_of_estimate = data["kinds_of_estimate"]  # 견적 종류
-        is_accompany = data["is_accompany"]  # 기사 동행 여부
-        people_count = data["people_count"]  # 인원 수
+        tariff = get_active_tariff()  # 현재 요금표
 
         # 날짜 및 조건 계산
-        days = 1  # 기본 운행 일수
-        if return_date:  # 복귀 날짜가 있을 경우 출발일과 복귀일의 차이 계산
-            return_date_parsed = datetime.strptime(str(return_date), "%Y-%m-%d")
-            departure_date_parsed = datetime.strptime(str(departure_date), "%Y-%m-%d")
-            days = (return_date_parsed - departure_date_parsed).days + 1
+        days, is_weekday, is_peak_season = get_quote_conditions(data["departure_date"], data.get("return_date"), tariff)
 
-        is_weekday = departure_date.weekday() < 5  # 평일 여부 확인
-        is_peak_season = departure_date.month in [4, 5, 9, 10]  # 성수기 여부 확인
+        # 일반 버스 요금 조회 (캐시에 없으면 계산, 우등 버스 요금은 응답 구성 시 추가)
+        regular_price = quote_cache.get_price(
+            tariff, data["distance"], data["kinds_of_estimate"], is_weekday, is_peak_season, data["is_accompany"], days
+        )
 
-        # 일반 및 우등 버스 요금 계산
-        regular_price = self.calculate_price(distance, kinds_of_estimate, is_weekday, is_peak_season, is_accompany, days)
-        luxury_price = regular_price + 150000  # 우등 버스 추가 요금 적용
+        # 응답 데이터 구성
+        response_data = build_price_response(regular_price, data["people_count"], tariff)
 
-        # 추천 버스 대수 및 좌석 정보 계산
-        recommended_seater = "45인승"  # 기본 추천 좌석
-        recommended_bus_count = 1  # 기본 버스 대수
+        return Response({"data": response_data})  
 
-        if people_count != "미정" and people_count.isdigit():  # 인원이 숫자일 경우 버스 대수 계산
-            if int(people_count) > 45:
-                recommended_bus_count = (int(people_count) + 44) // 45  # 버스 대수 계산 (45명 기준)
+# 견적 금액 일괄 조회 (여러 조건의 견적 금액을 한 번에 계산)
+class EstimatePriceBatchView(APIView):
+    permission_classes = [AllowAny]
+    MAX_QUOTES = 500  # 한 번에 조회할 수 있는 최대 견적 수
 
-        # 응답 데이터 구성
-        response_data = {
-            "recommended_seater": recommended_seater,  # 추천 좌석
-            "recommended_bus_count": str(recommended_bus_count),  # 추천 버스 대수
-            "price_list": [
-                {"price": str(regular_price), "bus_type": "일반"},  # 일반 버스 가격
-                {"price": str(luxury_price), "bus_type": "우등"}   # 우등 버스 가격
-            ]
-        }
+    def post(self, request):
+        quotes = request.data.get("quotes") if isinstance(request.data, dict) else request.data
+        if not isinstance(quotes, list) or not quotes:
+            return Response({
+                "result": "false",
+                "message": "quotes 목록이 요청에 포함되지 않았습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"data": response_data})  
+        if len(quotes) > self.MAX_QUOTES:
+            return Response({
+                "result": "false",
+                "message": f"한 번에 최대 {self.MAX_QUOTES}건까지 조회할 수 있습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = EstimatePriceSerializer(data=quotes, many=True)
+        serializer.is_valid(raise_exception=True)
+        quotes_data = serializer.validated_data
+        tariff = get_active_tariff()  # 모든 견적에 같은 요금표 사용
+
+        # 날짜 및 조건 계산
+        conditions = [get_quote_conditions(data["departure_date"], data.get("return_date"), tariff) for data in quotes_data]
+
+        # 일반 버스 요금을 배열 연산으로 한 번에 계산
+        regular_prices = calculate_prices(
+            [data["distance"] for data in quotes_data],
+            [data["kinds_of_estimate"] for data in quotes_data],
+            [is_weekday for _, is_weekday, _ in conditions],
+            [is_peak_season for _, _, is_peak_season in conditions],
+            [data["is_accompany"] for data in quotes_data],
+            [days for days, _, _ in conditions],
+            tariff,
+        )
+
+        # 요청 순서대로 응답 데이터 구성
+        response_data = [
+            build_price_response(regular_price, data["people_count"], tariff)
+            for regular_price, data in zip(regular_prices, quotes_data)
+        ]
+
+        return Response({"data": response_data})
+
+# 견적 금액 캐시 적중/미적중 통계 조회 (캐시 크기 조정용)
+class EstimatePriceCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "result": "true",
+            "message": "견적 금액 캐시 통계 조회 성공",
+            "data": quote_cache.get_stats()
+        }, status=status.HTTP_200_OK)
 
 # 견적 신청(POST), 견적 리스트 조회(GET)
 class EstimateView(APIView):
+    # 견적 신청 (Idempotency-Key 헤더가 같은 재시도는 처음 응답 반환)
+    @idempotent
     def post(self, request):
         serializer = EstimateSerializer(data=request.data)
         if serializer.is_valid():
-            # 저장, 견적 객체 생성
+            # 저장, 견적 객체 생성 (RPA-D 알림, TRP 전송은 대기열에 함께 기록됨)
             estimate = serializer.save(user=request.user)
-
-            # RPA-D 서버 알림 API 호출
-            rpad_url = f"{DEV4_SERVER}/user/notification"
-            notification_data = {
-                "title": "새 견적 신청 알림",
-                "content": f"새로운 견적이 신청되었습니다. 견적 ID: {estimate.id}",
-                "category": "일정",
-                "send_datetime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            }
-
-            try:
-                rpad_response = requests.post(rpad_url, json=notification_data)
-
-                if rpad_response.status_code != 201:
-                    return Response({
-                        "result": "false",
-                        "message": "견적 신청 성공, 그러나 알림 발송 실패 (RPA-D)"
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            except Exception as e:
-                return Response({
-                    "result": "false",
-                    "message": f"알림 발송 중 오류 발생 (RPA-D): {str(e)}"
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-            # TRP 서버에 견적 데이터 전송 추가
-            trp_url = f"{DEV4_SERVER}/dispatch/estimates"  # TRP 서버 URL
-
-            trp_payload = {
-                "estimate_id": estimate.id,
-
-                "departure": estimate.departure.address if estimate.departure and estimate.departure.address else "",
-                "arrival": estimate.arrival.address if estimate.arrival and estimate.arrival.address else "",
-                "departure_date": estimate.departure_date.strftime('%Y-%m-%d %H:%M:%S') if estimate.departure_date else "",
-                "arrival_date": estimate.return_date.strftime('%Y-%m-%d %H:%M:%S') if estimate.return_date else "",
-                "bus_cnt": estimate.vehicle_info.bus_count if estimate.vehicle_info and estimate.vehicle_info.bus_count else 0,
-                
-                "bus_type": estimate.vehicle_info.bus_type if estimate.vehicle_info and estimate.vehicle_info.bus_type else "",
-                "customer": estimate.user.username if estimate.user and estimate.user.username else "",
-                "customer_phone": estimate.user.phone_number if estimate.user and estimate.user.phone_number else "",
-                "price": estimate.virtual_estimate.price if estimate.virtual_estimate and estimate.virtual_estimate.price else 0,
-                "distance": estimate.distance if estimate.distance else 0,
-                
-                "payment_method": estimate.pay.price_type if estimate.pay and estimate.pay.price_type else "",
-                "operation_type": estimate.kinds_of_estimate if estimate.kinds_of_estimate else "",
-                "references": f"{estimate.stopover if estimate.stopover else ''} / {estimate.additional_requests if estimate.additional_requests else ''}".strip("/"),
-                "route": f"{estimate.departure.address if estimate.departure else ''} > {estimate.arrival.address if estimate.arrival else ''}".strip(">"),
-                # 추가적으로 RPAP에 없는 필드 처리
-                "contract_status": "보류",
-                "reservation_company": "성화투어",
-                "operating_company": "성화투어",
-                "driver_allowance": 0,
-                "cost_type": "",
-
-                "bill_place": "",
-                "collection_type": "",
-                "VAT": "y",
-                "total_price": 0,
-                "ticketing_info": "",
-                
-                "order_type": "",
-                "driver_lease": "",
-                "vehicle_lease": "",
-
-                "time": "0",
-
-                "night_work_time": "0",
-                "distance_list": "",
-                "time_list": "",
-                "option" : "",
-            }
-
-
-            try:
-                trp_response = requests.post(trp_url, json=trp_payload)
-
-                if trp_response.status_code != 201:
-                    return Response({
-                        "result": "false",
-                        "message": "견적 신청 성공, 그러나 TRP 데이터 전송 실패 : {trp_response.text}"
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            except Exception as e:
-                return Response({
-                    "result": "false",
-                    "message": f"TRP 데이터 전송 중 오류 발생: {str(e)}"
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            bump_estimate_list_version(request.user.id)
 
             # 최종 응답
             return Response({
@@ -230,15 +136,27 @@ class EstimateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     
-    # 견적 조회
+    # 견적 조회 (사용자별 리스트 버전이 바뀌기 전까지 캐시된 응답 반환, If-None-Match 일치 시 304)
+    @method_decorator(condition(etag_func=get_estimate_list_etag))
     def get(self, request):
+        cache_key = get_estimate_list_cache_key(request.user.id, request.query_params)
+        response_data = cache.get(cache_key)
+        if response_data is not None:
+            return Response(response_data, status=status.HTTP_200_OK)
+
+        response = self.get_list_response(request)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(cache_key, response.data, timeout=LIST_PAGE_TIMEOUT)
+        return response
+
+    def get_list_response(self, request):
         # 쿼리 파라미터 가져오기
         page = request.query_params.get("page", 1)
         is_finished = request.query_params.get("is_finished")
         is_value_changed = request.query_params.get("is_value_changed")
 
-        # 필터링
-        estimates = Estimate.objects.filter(user=request.user)
+        # 필터링 (리스트 직렬화에 필요한 출발지, 도착지, 가견적을 함께 조회)
+        estimates = Estimate.objects.select_related("departure", "arrival", "virtual_estimate").filter(user=request.user)
         if is_finished == "true":
             estimates = estimates.filter(is_finished=True)
         elif is_finished == "false":
@@ -249,6 +167,17 @@ class EstimateView(APIView):
         elif is_value_changed == "false":
             estimates = estimates.filter(is_value_changed=False)
 
+        # 다음/이전 페이지 URL에 유지할 필터
+        base_url = f"{request.build_absolute_uri(request.path)}?"
+        filter_params = {
+            key: value for key, value in (("is_finished", is_finished), ("is_value_changed", is_value_changed)) if value
+        }
+
+        # 커서 페이징 (pagination=cursor 또는 cursor 파라미터가 있는 경우)
+        cursor = request.query_params.get("cursor")
+        if cursor or request.query_params.get("pagination") == "cursor":
+            return self.get_cursor_page(request, estimates, cursor, base_url, filter_params)
+
         # 페이징 처리
         paginator = Paginator(estimates, 10)  # 페이지당 10개
         try:
@@ -263,13 +192,12 @@ class EstimateView(APIView):
         serializer = EstimateListSerializer(current_page.object_list, many=True)
         
         # URL 생성
-        base_url = request.build_absolute_uri('?')
         next_url = (
-            f"{base_url}{urlencode({'page': current_page.next_page_number(), 'is_finished': is_finished})}"
+            f"{base_url}{urlencode({'page': current_page.next_page_number(), **filter_params})}"
             if current_page.has_next() else None
         )
         previous_url = (
-            f"{base_url}{urlencode({'page': current_page.previous_page_number(), 'is_finished': is_finished})}"
+            f"{base_url}{urlencode({'page': current_page.previous_page_number(), **filter_params})}"
             if current_page.has_previous() else None
         )
 
@@ -286,14 +214,104 @@ class EstimateView(APIView):
         }
         return Response(response_data, status=status.HTTP_200_OK)
 
+    # 커서 페이징: 페이지 깊이와 관계없이 조회 비용 일정, 전체 개수는 with_count=true인 경우에만 계산
+    def get_cursor_page(self, request, estimates, cursor, base_url, filter_params):
+        try:
+            items, next_cursor = KeysetPagination().paginate_queryset(estimates, cursor)
+        except ValueError as e:
+            return Response({
+                "result": "false",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = EstimateListSerializer(items, many=True)
+        next_url = (
+            f"{base_url}{urlencode({'pagination': 'cursor', 'cursor': next_cursor, **filter_params})}"
+            if next_cursor else None
+        )
+
+        response_data = {
+            "result": "true",
+            "message": "견적 리스트 조회 성공",
+            "data": {
+                "count": estimates.count() if request.query_params.get("with_count") == "true" else None,
+                "next": next_url,
+                "previous": None,
+                "estimates": serializer.data,
+            }
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+# 견적 일괄 신청 (기업 고객 대량 등록)
+class EstimateBulkImportView(APIView):
+    MAX_ESTIMATES = 1000  # 한 번에 신청할 수 있는 최대 견적 수
+
+    def post(self, request):
+        rows = request.data.get("estimates") if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({
+                "result": "false",
+                "message": "estimates 목록이 요청에 포함되지 않았습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(rows) > self.MAX_ESTIMATES:
+            return Response({
+                "result": "false",
+                "message": f"한 번에 최대 {self.MAX_ESTIMATES}건까지 신청할 수 있습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        created_ids, errors = import_estimates(request.user, rows)
+        if not created_ids:
+            return Response({
+                "result": "false",
+                "message": "유효한 견적이 없습니다.",
+                "errors": errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "result": "true",
+            "message": f"견적 {len(created_ids)}건 일괄 신청 성공",
+            "data": {
+                "created_ids": created_ids,
+                "errors": errors
+            }
+        }, status=status.HTTP_201_CREATED)
+
+# 견적 변경 내역 조회 (since 토큰 이후 변경/삭제된 견적만 반환)
+class EstimateChangesView(APIView):
+    def get(self, request):
+        try:
+            changed, deleted_ids, next_token, has_more = get_estimate_changes(request.user, request.query_params.get("since"))
+        except ValueError as e:
+            return Response({
+                "result": "false",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "result": "true",
+            "message": "견적 변경 내역 조회 성공",
+            "data": {
+                "changed": EstimateListSerializer(changed, many=True).data,
+                "deleted": deleted_ids,
+                "next_token": next_token,
+                "has_more": has_more,
+            }
+        }, status=status.HTTP_200_OK)
+
 # 견적 상세 조회(GET), 견적 삭제(DELETE)
 class EstimateDetailView(APIView):
 
-    # 견적 상세 조회
+    # 견적 상세 조회 (If-None-Match 일치 시 304)
+    @method_decorator(condition(etag_func=get_estimate_detail_etag))
     def get(self, request, estimate_id):
-        # Estimate 객체 가져오기
+        # Estimate 객체 가져오기 (상세 직렬화에 필요한 연관 객체를 함께 조회)
         try:
-            estimate = Estimate.objects.get(id=estimate_id, user=request.user)
+            estimate = (
+                Estimate.objects
+                .select_related("departure", "arrival", "virtual_estimate", "pay", "vehicle_info")
+                .get(id=estimate_id, user=request.user)
+            )
         except Estimate.DoesNotExist:
             return Response({
                 'result': 'false',
@@ -320,7 +338,9 @@ class EstimateDetailView(APIView):
             
             # 트랜잭션 처리로 데이터 삭제
             with transaction.atomic():
+                DeletedEstimate.objects.create(estimate_id=estimate.id, user_id=estimate.user_id)  # 변경 내역 동기화용 삭제 기록
                 estimate.delete()
+                bump_estimate_list_version(estimate.user_id)
             
             return Response({
                 "result": "true",
@@ -367,6 +387,8 @@ class EstimateDetailView(APIView):
             # 변화 여부 저장
             updated_estimate.is_value_changed = True
             updated_estimate.save()
+            bump_estimate_list_version(updated_estimate.user_id)
+            publish_estimate_event(updated_estimate)
 
             return Response({
                 "result": "true",
@@ -391,7 +413,8 @@ class EstimateDetailView(APIView):
 
 # 리뷰 등록(POST)
 class ReviewView(APIView):
-    # 리뷰 등록
+    # 리뷰 등록 (Idempotency-Key 헤더가 같은 재시도는 처음 응답 반환)
+    @idempotent
     def post(self, request):
         serializer = ReviewSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -407,7 +430,13 @@ class ReviewView(APIView):
             "errors": serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
-# 리뷰 조회
+# 리뷰 목록 ETag (리뷰 수 + 마지막 리뷰 ID + 전체 견적 버전), 리뷰 파일은 리뷰 등록 시에만 저장됨
+def get_review_list_etag(request, *args, **kwargs):
+    reviews = Review.objects.aggregate(count=Count("id"), last_id=Max("id"))
+    return f"reviews-{reviews['count']}-{reviews['last_id']}-{get_estimates_version()}"
+
+# 리뷰 조회 (If-None-Match 일치 시 304)
+@method_decorator(condition(etag_func=get_review_list_etag), name="get")
 class ReviewListView(ListAPIView):
     queryset = Review.objects.all().order_by('-created_at')  # 최신순 정렬
     serializer_class = ReviewListSerializer
@@ -421,69 +450,77 @@ class ReviewListView(ListAPIView):
             "data": response.data
         })   
 
-# 10, 14시마다 유저에게는 입금 요청 알림을, 관리자에게는 입금 확인 알림을 보냄
+# 10, 14시마다 (manage.py run_scheduler 프로세스에서) 유저에게는 입금 요청 알림을, 관리자에게는 입금 확인 알림을 보냄
 class EstimateNotificationScheduler(APIView):
-    RPA_D_SERVER_URL = f"{DEV4_SERVER}/user/notification"  # RPA-D 서버 URL
+    DIGEST_MAX_IDS = 200  # 관리자 묶음 알림 하나에 담을 최대 견적 수
+    CHUNK_SIZE = 2000  # 한 번에 조회/전송할 견적 수
+    JOB_LEASE_SECONDS = 60 * 60  # 작업 lease 유지 시간 (초), 같은 slot의 중복 실행 방지
 
+    # 계약금 입금 요청 알림 제목과 내용
     @staticmethod
-    def send_user_notification(user, departure_date, return_date):
-        """
-        사용자에게 계약금 입금 요청 알림을 보냅니다.
-        """
-        try:
-            # 날짜 포맷팅 (일까지만 표시)
-            formatted_departure_date = departure_date.strftime('%Y-%m-%d') if departure_date else "미정"
-            formatted_return_date = return_date.strftime('%Y-%m-%d') if return_date else "미정"
-
-            # 알림 제목과 내용 설정
-            title = "계약금 입금 요청"
-            body = f"출발일 : {formatted_departure_date} -> 도착일 : {formatted_return_date}의 견적의 계약금을 입금해주세요."
-
-            # `send_notification` 함수로 알림 전송
-            send_notification(user, title, body)
-
-            print(f"[USER NOTIFICATION] Successfully sent notification to user {user.username}")
-        except FCMToken.DoesNotExist:
-            print(f"[USER NOTIFICATION] No FCM token found for user {user.username}")
-        except Exception as e:
-            print(f"[USER NOTIFICATION] Error sending notification to user {user.username}: {e}")
+    def build_user_notification(departure_date, return_date):
+        # 날짜 포맷팅 (일까지만 표시)
+        formatted_departure_date = departure_date.strftime('%Y-%m-%d') if departure_date else "미정"
+        formatted_return_date = return_date.strftime('%Y-%m-%d') if return_date else "미정"
 
+        title = "계약금 입금 요청"
+        body = f"출발일 : {formatted_departure_date} -> 도착일 : {formatted_return_date}의 견적의 계약금을 입금해주세요."
+        return title, body
 
+    # 유저 알림은 전송 대기열에 기록 (run_worker가 전송, 일시적 오류는 재시도)
     @staticmethod
-    def send_admin_notification(estimate_id):
-        # 관리자에게 알림 전송
-        notification_data = {
-            "title": "계약금 입금 확인 요청",
-            "content": f"견적 {estimate_id}의 계약금 입금을 확인해주세요.",
-            "category": "일정",
-            "send_datetime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        }
-        try:
-            response = requests.post(EstimateNotificationScheduler.RPA_D_SERVER_URL, json=notification_data)
-            if response.status_code == 201:
-                print(f"Admin notification sent for estimate {estimate_id}")
-            else:
-                print(f"Failed to send admin notification: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"Error sending admin notification: {str(e)}")
+    def send_notifications_for_pending_estimates():
+        # 계약금 입금 대기 상태인 견적을 CHUNK_SIZE 단위로 조회 (전체를 메모리에 올리지 않음)
+        estimates = Estimate.objects.filter(status="계약금 입금 대기").order_by("id").values_list(
+            "id", "user_id", "departure_date", "return_date"
+        )
+        stats = Counter()
+        estimate_ids = []
+        chunk = []
+        for row in estimates.iterator(chunk_size=EstimateNotificationScheduler.CHUNK_SIZE):
+            chunk.append(row)
+            estimate_ids.append(row[0])
+            if len(chunk) == EstimateNotificationScheduler.CHUNK_SIZE:
+                stats += EstimateNotificationScheduler.send_chunk_notifications(chunk)
+                chunk = []
+        if chunk:
+            stats += EstimateNotificationScheduler.send_chunk_notifications(chunk)
+        print(f"[USER NOTIFICATION] {dict(stats)}")
+
+        # 관리자 알림은 실행마다 묶어서 전송 대기열에 기록
+        if estimate_ids:
+            enqueue_deposit_check_digest(estimate_ids, EstimateNotificationScheduler.DIGEST_MAX_IDS)
+        return stats
 
     @staticmethod
-    def send_notifications_for_pending_estimates():
-        # 계약금 입금 대기 상태인 견적 찾기
-        estimates = Estimate.objects.filter(status="계약금 입금 대기")
-        for estimate in estimates:
-            EstimateNotificationScheduler.send_user_notification(estimate.user, estimate.departure_date ,estimate.return_date)
-            EstimateNotificationScheduler.send_admin_notification(estimate.id)
+    def send_chunk_notifications(chunk):
+        # 청크의 유저 알림을 작업 하나로 대기열에 기록 (run_worker가 send_notifications로 묶어서 전송)
+        notifications = [
+            (user_id, *EstimateNotificationScheduler.build_user_notification(departure_date, return_date))
+            for _, user_id, departure_date, return_date in chunk
+            if user_id is not None
+        ]
+        enqueue_notification_batch(notifications)
+        return Counter(queued=len(notifications))
+
+    # 스케줄 실행: 같은 시간대(slot)의 작업은 여러 인스턴스 중 하나만 실행
+    @staticmethod
+    def run_scheduled_notifications():
+        slot = now().strftime('%Y%m%d%H')
+        run_exclusive(
+            f"pending_estimates_notification:{slot}",
+            EstimateNotificationScheduler.send_notifications_for_pending_estimates,
+            EstimateNotificationScheduler.JOB_LEASE_SECONDS,
+        )
 
     @staticmethod
-    def schedule_jobs():
-        # 스케줄러 생성
-        scheduler = BackgroundScheduler()
-        # 매일 10시 실행
-        scheduler.add_job(EstimateNotificationScheduler.send_notifications_for_pending_estimates, 'cron', hour=10, minute=0)
-        # 매일 14시 실행
-        scheduler.add_job(EstimateNotificationScheduler.send_notifications_for_pending_estimates, 'cron', hour=14, minute=0)
-        scheduler.start()
+    def schedule_jobs(scheduler):
+        # 매일 10시, 14시 실행 (놓친 실행은 한 번만, 유예 시간 안에서만 실행)
+        for hour in (10, 14):
+            scheduler.add_job(
+                EstimateNotificationScheduler.run_scheduled_notifications, 'cron', hour=hour, minute=0,
+                id=f"pending_estimates_notification_{hour}", coalesce=True, misfire_grace_time=600,
+            )
 
     # 수동 실행용 API 추가
     def post(self, request):
@@ -500,9 +537,6 @@ class EstimateNotificationScheduler(APIView):
                 "message": f"오류 발생: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# 서버 시작 시 스케줄러 실행
-EstimateNotificationScheduler.schedule_jobs()
-
 
 # TRP에서 받은 예약확정 상태를 저장하고 유저에게 알림
 class EstimateStatusUpdateView(APIView):
@@ -534,13 +568,16 @@ class EstimateStatusUpdateView(APIView):
             # Estimate 객체 가져오기
             estimate = Estimate.objects.get(id=estimate_id)
 
-            # 상태 업데이트
-            estimate.status = estimate_status
-            estimate.save()
+            # 상태 업데이트와 유저 알림 기록을 한 트랜잭션으로 저장
+            with transaction.atomic():
+                estimate.status = estimate_status
+                estimate.save()
+                bump_estimate_list_version(estimate.user_id)
+                publish_estimate_event(estimate)
 
-            # 유저 알림 전송
-            if estimate.status == "예약 완료":
-                self.notify_user(estimate)
+                # 유저 알림 전송
+                if estimate.status == "예약 완료":
+                    self.notify_user(estimate)
 
             return Response({
                 "result": "true",
@@ -558,28 +595,157 @@ class EstimateStatusUpdateView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
     def notify_user(self, estimate):
-        # 날짜 포맷팅 (일까지만 표시)
-        formatted_departure_date = estimate.departure_date.strftime('%Y-%m-%d') if estimate.departure_date else "미정"
-        formatted_return_date = estimate.return_date.strftime('%Y-%m-%d') if estimate.return_date else "미정"
-        
         """
         유저에게 상태 변경 알림 전송
         """
-        title = "예약 완료 알림"
-        body = f"출발일 : {formatted_departure_date} > 도착일 : {formatted_return_date}이 예약 완료 되었습니다."
+        title, body = self.build_confirm_notification(estimate)
 
-        try:
-            send_notification(estimate.user, title, body)
+        # 전송 대기열에 기록 (run_worker가 전송, 실패 시 재시도)
+        enqueue_user_notification(estimate.user_id, title, body)
 
-        except Exception as e:
-            return Response({
-                "result": "false",
-                "message": "알림 전송 실패"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    @staticmethod
+    def build_confirm_notification(estimate):
+        # 날짜 포맷팅 (일까지만 표시)
+        formatted_departure_date = estimate.departure_date.strftime('%Y-%m-%d') if estimate.departure_date else "미정"
+        formatted_return_date = estimate.return_date.strftime('%Y-%m-%d') if estimate.return_date else "미정"
+
+        title = "예약 완료 알림"
+        body = f"출발일 : {formatted_departure_date} > 도착일 : {formatted_return_date}이 예약 완료 되었습니다."
+        return title, body
 
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
             return x_forwarded_for.split(',')[0]
         return request.META.get('REMOTE_ADDR')
- 
\ No newline at end of file
+ 
+
+
+# 견적 상태 일괄 변경 (TRP에서 여러 견적을 한 번에 확정)
+# items: [{"estimate_id": 1, "status": "예약 완료"}, ...]
+# 한 트랜잭션에서 bulk_update로 저장하고 '예약 완료' 알림은 한 번에 대기열에 기록, 항목별 결과 반환
+class EstimateStatusBatchUpdateView(EstimateStatusUpdateView):
+    MAX_ITEMS = 1000  # 한 번에 변경할 수 있는 최대 견적 수
+
+    def patch(self, request):
+        client_ip = self.get_client_ip(request)
+        if client_ip not in self.ALLOWED_IPS:
+            return HttpResponseForbidden("Access denied: Unauthorized IP")
+
+        items = request.data.get("items") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({
+                "result": "false",
+                "message": "items 목록이 요청에 포함되지 않았습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(items) > self.MAX_ITEMS:
+            return Response({
+                "result": "false",
+                "message": f"한 번에 최대 {self.MAX_ITEMS}건까지 변경할 수 있습니다."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        changes = {}  # estimate_id: (항목 순서, 변경할 상태)
+        max_length = Estimate._meta.get_field("status").max_length
+        for index, item in enumerate(items):
+            estimate_id = item.get("estimate_id") if isinstance(item, dict) else None
+            estimate_status = item.get("status") if isinstance(item, dict) else None
+            try:
+                estimate_id = int(estimate_id)
+            except (TypeError, ValueError):
+                results[index] = self.item_result(estimate_id, estimate_status, "estimate_id가 요청에 포함되지 않았습니다.")
+                continue
+            if not isinstance(estimate_status, str) or not estimate_status:
+                results[index] = self.item_result(estimate_id, estimate_status, "status가 요청에 포함되지 않았습니다.")
+            elif len(estimate_status) > max_length:
+                results[index] = self.item_result(estimate_id, estimate_status, f"status는 {max_length}자 이하여야 합니다.")
+            elif estimate_id in changes:
+                results[index] = self.item_result(estimate_id, estimate_status, "중복된 estimate_id입니다.")
+            else:
+                changes[estimate_id] = (index, estimate_status)
+
+        with transaction.atomic():
+            estimates = Estimate.objects.select_for_update().in_bulk(list(changes))
+            updated_at = now()
+            notifications = []
+            for estimate_id, (index, estimate_status) in changes.items():
+                estimate = estimates.get(estimate_id)
+                if estimate is None:
+                    results[index] = self.item_result(estimate_id, estimate_status, "해당 견적을 찾을 수 없습니다.")
+                    continue
+                previous_status = estimate.status
+                estimate.status = estimate_status
+                estimate.updated_at = updated_at
+                publish_estimate_event(estimate)
+                # 이미 예약 완료인 견적을 다시 확정한 경우에는 알림을 보내지 않음
+                if estimate.status == "예약 완료" and previous_status != estimate.status:
+                    notifications.append((estimate.user_id, *self.build_confirm_notification(estimate)))
+                results[index] = self.item_result(estimate_id, estimate_status)
+
+            updated = list(estimates.values())
+            Estimate.objects.bulk_update(updated, ["status", "updated_at"], batch_size=500)
+            bump_estimate_list_version(*{estimate.user_id for estimate in updated})
+            enqueue_user_notifications(notifications)
+
+        if not updated:
+            return Response({
+                "result": "false",
+                "message": "변경된 견적이 없습니다.",
+                "data": {"results": results}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "result": "true",
+            "message": f"견적 {len(updated)}건 상태 변경 성공",
+            "data": {
+                "updated_count": len(updated),
+                "results": results
+            }
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def item_result(estimate_id, estimate_status, error=None):
+        if error:
+            return {"estimate_id": estimate_id, "status": estimate_status, "result": "false", "message": error}
+        return {"estimate_id": estimate_id, "status": estimate_status, "result": "true"}
+
+
+# 견적 상태 실시간 전송 (SSE, ASGI 서버에서만 동작)
+# EventSource는 헤더를 설정할 수 없으므로 Authorization 헤더 또는 ?token= 으로 인증
+class EstimateEventStreamView(View):
+    HEARTBEAT_SECONDS = 15  # 연결 유지용 주석 전송 주기
+
+    def authenticate(self, request):
+        authentication = JWTAuthentication()
+        raw_token = request.GET.get("token")
+        if raw_token:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        result = authentication.authenticate(request)
+        return result[0] if result else None
+
+    async def get(self, request):
+        try:
+            user = await sync_to_async(self.authenticate)(request)
+        except (InvalidToken, AuthenticationFailed):
+            user = None
+        if user is None:
+            return JsonResponse({
+                "result": "false",
+                "message": "인증 정보가 유효하지 않습니다."
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        response = StreamingHttpResponse(self.stream(user.id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx 버퍼링 비활성화
+        return response
+
+    async def stream(self, user_id):
+        async with get_event_backend().subscribe(user_id) as subscription:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.get(timeout=self.HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
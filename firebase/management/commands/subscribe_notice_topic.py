@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from firebase.models import FCMToken
+from firebase.send_message import subscribe_tokens_to_topic, NOTICE_TOPIC, TOPIC_SUBSCRIBE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Subscribe FCM tokens that are not yet subscribed to the notice topic (backfill and retry)"
+
+    def handle(self, *args, **options):
+        subscribed_count = 0
+        failed_count = 0
+        last_id = 0
+
+        # ID 순서로 TOPIC_SUBSCRIBE_BATCH_SIZE 건씩 구독
+        while True:
+            tokens = list(
+                FCMToken.objects.filter(topic_subscribed=False, id__gt=last_id)
+                .order_by("id").values_list("id", "token")[:TOPIC_SUBSCRIBE_BATCH_SIZE]
+            )
+            if not tokens:
+                break
+            last_id = tokens[-1][0]
+
+            subscribed_tokens = subscribe_tokens_to_topic([token for _, token in tokens], NOTICE_TOPIC)
+            FCMToken.objects.filter(token__in=subscribed_tokens).update(topic_subscribed=True)
+            subscribed_count += len(subscribed_tokens)
+            failed_count += len(tokens) - len(subscribed_tokens)
+
+        self.stdout.write(self.style.SUCCESS(f"{subscribed_count} tokens subscribed, {failed_count} failed."))
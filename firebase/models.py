@@ -2,6 +2,7 @@ from django.db import models
 from user.models import User
 class FCMToken(models.Model) :
     user = models.ForeignKey(User, verbose_name=("fcm_tokens"), on_delete=models.CASCADE)
-    token = models.CharField(max_length=255)
+    token = models.CharField(max_length=255, unique=True)  # 기기별 토큰 (사용자당 여러 개)
+    topic_subscribed = models.BooleanField(default=False)  # 공지사항 topic 구독 여부
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
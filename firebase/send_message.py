@@ -1,29 +1,213 @@
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
 from firebase_admin import messaging
-from firebase_admin.exceptions import FirebaseError
 from .models import FCMToken
 
+FCM_BATCH_SIZE = 500  # send_each 한 번에 보낼 수 있는 최대 메시지 수
+FCM_MAX_WORKERS = 4  # 동시에 전송할 배치 수
+PERMANENT_ERROR_CODES = {"UNREGISTERED", "INVALID_ARGUMENT"}  # 재시도해도 성공할 수 없는 FCM 오류
+TOPIC_SUBSCRIBE_BATCH_SIZE = 1000  # subscribe_to_topic 한 번에 등록할 수 있는 최대 토큰 수
+NOTICE_TOPIC = "notices"  # 공지사항 구독 topic (모든 기기)
+
+
+# 알림 전송 실패 (permanent: 재시도해도 실패하는 오류)
+class NotificationError(Exception):
+    def __init__(self, code):
+        super().__init__(f"FCM error: {code}")
+        self.code = code
+        self.permanent = code in PERMANENT_ERROR_CODES
+
+
+# 사용자의 모든 기기에 알림 전송 (user 또는 user_id), 한 번의 send_each 요청
+# FCM 토큰이 없으면 False, 모든 기기에 전송 실패 시 NotificationError 발생 (호출하는 쪽에서 재시도 여부 결정)
+# 일부 기기만 실패한 경우 재시도하지 않음 (성공한 기기에 중복 전송 방지)
 def send_notification(user, title, body):
-    try:
-        # 사용자에 대한 FCM 토큰 가져오기
-        fcm_token = FCMToken.objects.get(user=user).token
+    # 사용자에 대한 FCM 토큰 가져오기
+    fcm_tokens = list(FCMToken.objects.filter(user=user).values_list("token", flat=True))
+    if not fcm_tokens:
+        print(f"No FCM token found for user {user}")
+        return False
 
-        # 알림 메시지 구성
-        message = messaging.Message(
+    # 알림 메시지 구성 (기기별)
+    messages = [
+        messaging.Message(
             notification=messaging.Notification(
                 title=title,
                 body=body,
             ),
             token=fcm_token,  # 클라이언트의 FCM 토큰
         )
+        for fcm_token in fcm_tokens
+    ]
 
-        # Firebase로 알림 전송
-        response = messaging.send(message)
-        print(f"Successfully sent message: {response}")
+    # Firebase로 알림 전송
+    try:
+        errors = get_transport().send_each(messages)
+    except Exception as e:
+        raise NotificationError(_get_error_code(e)) from e
+    prune_unregistered_tokens(messages, errors)
 
-    except FCMToken.DoesNotExist:
-        print(f"No FCM token found for user {user}")
-    except FirebaseError as fe:
-        print(f"Firebase error occurred: {fe}")
+    failed = [error for error in errors if error is not None]
+    if len(failed) == len(messages):
+        # 일시적 오류가 있으면 재시도 가능한 오류로 전달
+        transient = [error for error in failed if error not in PERMANENT_ERROR_CODES]
+        raise NotificationError(transient[0] if transient else failed[0])
+    print(f"Successfully sent message to user {user} ({len(messages) - len(failed)}/{len(messages)} devices)")
+    return True
+
+
+# FCM이 등록 해제(UNREGISTERED)로 응답한 토큰 일괄 삭제, 삭제한 수 반환
+def prune_unregistered_tokens(messages, errors):
+    stale_tokens = [message.token for message, error in zip(messages, errors) if error == "UNREGISTERED"]
+    if not stale_tokens:
+        return 0
+    deleted_count, _ = FCMToken.objects.filter(token__in=stale_tokens).delete()
+    print(f"Pruned {deleted_count} unregistered FCM tokens")
+    return deleted_count
+
+
+# Firebase Admin SDK 배치 전송 (메시지별 실패 코드 반환, 성공은 None)
+class FirebaseTransport:
+    def send_each(self, messages):
+        response = messaging.send_each(messages)
+        return [None if result.success else _get_error_code(result.exception) for result in response.responses]
+
+    # 토큰별 topic 구독 실패 사유 반환, 성공은 None
+    def subscribe_to_topic(self, tokens, topic):
+        response = messaging.subscribe_to_topic(tokens, topic)
+        errors = [None] * len(tokens)
+        for error in response.errors:
+            errors[error.index] = error.reason
+        return errors
+
+
+# 로컬 벤치마크/테스트용 전송 (FCM을 호출하지 않고 latency만큼 대기)
+# errors: 토큰(또는 topic)별로 반환할 오류 코드, 그 외 메시지는 failure_rate 확률로 UNAVAILABLE
+class FakeTransport:
+    def __init__(self, latency=0.0, failure_rate=0.0, errors=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.errors = errors if errors is not None else {}
+        self.batches = []  # send_each 호출별 메시지 목록
+
+    @property
+    def sent(self):
+        return [message for batch in self.batches for message in batch]
+
+    def send_each(self, messages):
+        time.sleep(self.latency)
+        self.batches.append(list(messages))
+        return [
+            self.errors.get(message.token or message.topic)
+            or ("UNAVAILABLE" if random.random() < self.failure_rate else None)
+            for message in messages
+        ]
+
+    def subscribe_to_topic(self, tokens, topic):
+        time.sleep(self.latency)
+        return [None] * len(tokens)
+
+
+def _get_error_code(exception):
+    if isinstance(exception, messaging.UnregisteredError):
+        return "UNREGISTERED"
+    return getattr(exception, "code", None) or type(exception).__name__
+
+
+# settings.FCM_TRANSPORT 에 지정된 전송 방식 (기본값 Firebase)
+def get_transport():
+    return import_string(getattr(settings, "FCM_TRANSPORT", "firebase.send_message.FirebaseTransport"))()
+
+
+# 사용자 ID별 FCM 토큰 목록 (한 번의 쿼리)
+def get_tokens_by_user(user_ids):
+    tokens = defaultdict(list)
+    for user_id, token in FCMToken.objects.filter(user_id__in=user_ids).values_list("user_id", "token"):
+        tokens[user_id].append(token)
+    return tokens
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# 여러 사용자의 모든 기기에 알림 전송: notifications = [(user_id, title, body), ...]
+# FCM_BATCH_SIZE 단위 배치를 최대 max_workers개 동시에 전송하고 결과를 집계해 반환
+# (기기 기준 sent, failed, error:<FCM 오류 코드>, 사용자 기준 no_token, 삭제한 토큰 수 pruned)
+# retry 목록을 넘기면 모든 기기에 일시적 오류로 전송하지 못한 알림을 담음 (send_notification과 같은 기준)
+def send_notifications(notifications, transport=None, max_workers=FCM_MAX_WORKERS, retry=None):
+    transport = transport or get_transport()
+    stats = Counter()
+
+    messages = []
+    owners = []  # 메시지별 알림 순서
+    for start in range(0, len(notifications), FCM_BATCH_SIZE):
+        chunk = notifications[start:start + FCM_BATCH_SIZE]
+        tokens = get_tokens_by_user({user_id for user_id, _, _ in chunk})
+        for index, (user_id, title, body) in enumerate(chunk, start=start):
+            if user_id not in tokens:
+                stats["no_token"] += 1
+                continue
+            for token in tokens[user_id]:
+                messages.append(
+                    messaging.Message(notification=messaging.Notification(title=title, body=body), token=token)
+                )
+                owners.append(index)
+
+    def send_batch(batch):
+        try:
+            return transport.send_each(batch)
+        except Exception as e:
+            # 배치 전체 실패 (인증 오류, 네트워크 오류 등)
+            return [_get_error_code(e)] * len(batch)
+
+    all_errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for errors in executor.map(send_batch, _chunks(messages, FCM_BATCH_SIZE)):
+            all_errors.extend(errors)
+            for error in errors:
+                if error is None:
+                    stats["sent"] += 1
+                else:
+                    stats["failed"] += 1
+                    stats[f"error:{error}"] += 1
+
+    stats["pruned"] = prune_unregistered_tokens(messages, all_errors)
+
+    if retry is not None:
+        errors_by_owner = defaultdict(list)
+        for owner, error in zip(owners, all_errors):
+            errors_by_owner[owner].append(error)
+        retry.extend(
+            notifications[owner] for owner, errors in errors_by_owner.items()
+            if all(errors) and any(error not in PERMANENT_ERROR_CODES for error in errors)
+        )
+    return stats
+
+
+# topic 구독 기기 전체에 알림 한 번 전송, 실패 시 NotificationError 발생
+def send_topic_notification(topic, title, body):
+    message = messaging.Message(notification=messaging.Notification(title=title, body=body), topic=topic)
+    try:
+        error = get_transport().send_each([message])[0]
     except Exception as e:
-        print(f"Error sending notification: {e}")
+        raise NotificationError(_get_error_code(e)) from e
+    if error is not None:
+        raise NotificationError(error)
+    print(f"Successfully sent message to topic {topic}")
+
 
+# 토큰을 topic에 구독 (TOPIC_SUBSCRIBE_BATCH_SIZE 단위), 구독에 성공한 토큰 목록 반환
+def subscribe_tokens_to_topic(tokens, topic=NOTICE_TOPIC):
+    transport = get_transport()
+    subscribed_tokens = []
+    for chunk in _chunks(list(tokens), TOPIC_SUBSCRIBE_BATCH_SIZE):
+        errors = transport.subscribe_to_topic(chunk, topic)
+        subscribed_tokens.extend(token for token, error in zip(chunk, errors) if error is None)
+    return subscribed_tokens
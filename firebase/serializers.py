@@ -1,18 +1,26 @@
+from django.db import transaction
 from rest_framework import serializers
+from dispatch.outbox import enqueue_topic_subscription
 from .models import FCMToken
 
 class FCMTokenSerializer(serializers.ModelSerializer):
     class Meta:
         model = FCMToken
         fields = ['token']
+        # 이미 등록된 토큰도 다시 등록할 수 있도록 (다른 사용자로 로그인한 기기 포함)
+        extra_kwargs = {'token': {'validators': []}}
 
     def create(self, validated_data):
         user = self.context['request'].user  # 요청을 보낸 사용자
         token = validated_data['token']
 
-        # 기존에 등록된 토큰이 있다면 업데이트, 없으면 새로 생성
-        fcm_token, created = FCMToken.objects.update_or_create(
-            user=user,
-            defaults={'token': token}
-        )
+        # 기기(토큰)별로 저장, 이미 등록된 토큰이면 현재 사용자로 갱신
+        # 공지사항 topic 구독은 전송 대기열에 기록 (run_worker가 구독, 실패 시 재시도)
+        with transaction.atomic():
+            fcm_token, created = FCMToken.objects.update_or_create(
+                token=token,
+                defaults={'user': user}
+            )
+            if not fcm_token.topic_subscribed:
+                enqueue_topic_subscription(token)
         return fcm_token
@@ -1,3 +1,90 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from dispatch.outbox import process_due_messages
+from user.models import User
+from .models import FCMToken
+from . import send_message
+from .send_message import FakeTransport, send_notification, send_notifications
+
+
+# 기기별 토큰 등록, 모든 기기로 전송, 등록 해제된 토큰 삭제
+class FCMTokenRegistryTest(TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        patcher = mock.patch.object(send_message, "get_transport", return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_register_multiple_devices(self):
+        for token in ["phone", "tablet", "phone"]:
+            response = self.client.post("/users/fcm-token", {"token": token})
+            self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(sorted(FCMToken.objects.filter(user=self.user).values_list("token", flat=True)), ["phone", "tablet"])
+        # 새 기기의 공지사항 topic 구독은 등록 요청 밖에서 처리
+        self.assertEqual(FCMToken.objects.filter(topic_subscribed=False).count(), 2)
+        process_due_messages()
+        self.assertFalse(FCMToken.objects.filter(topic_subscribed=False).exists())
+
+    def test_send_to_all_devices_and_prune_unregistered(self):
+        FCMToken.objects.create(user=self.user, token="phone")
+        FCMToken.objects.create(user=self.user, token="old-phone")
+        self.transport.errors["old-phone"] = "UNREGISTERED"
+
+        self.assertTrue(send_notification(self.user.id, "제목", "내용"))
+        self.assertEqual(sorted(message.token for message in self.transport.sent), ["old-phone", "phone"])
+        self.assertEqual(list(FCMToken.objects.values_list("token", flat=True)), ["phone"])
+
+
+# 여러 사용자 알림 일괄 전송: 청크별 토큰 조회, 500건 이하 배치, 결과 집계
+class SendNotificationsTest(TestCase):
+    def test_batches_and_stats(self):
+        User.objects.bulk_create([
+            User(username=f"user{index}", phone_number=f"010{index:08d}") for index in range(1100)
+        ])
+        users = list(User.objects.order_by("id"))
+        FCMToken.objects.bulk_create(
+            [FCMToken(user=user, token=f"token-{index}") for index, user in enumerate(users[:1050])]
+            + [FCMToken(user=users[0], token="token-0-tablet")]
+        )
+        transport = FakeTransport(errors={"token-1": "UNREGISTERED", "token-2": "UNAVAILABLE"})
+
+        lookups = []
+        original = send_message.get_tokens_by_user
+
+        def get_tokens_by_user(user_ids):
+            lookups.append(len(user_ids))
+            return original(user_ids)
+
+        with mock.patch.object(send_message, "get_tokens_by_user", get_tokens_by_user):
+            stats = send_notifications([(user.id, "제목", "내용") for user in users], transport=transport)
+
+        self.assertEqual(lookups, [500, 500, 100])
+        self.assertEqual(sorted(len(batch) for batch in transport.batches), [51, 500, 500])
+        self.assertEqual(dict(stats), {
+            "sent": 1049, "failed": 2, "error:UNREGISTERED": 1, "error:UNAVAILABLE": 1, "no_token": 50, "pruned": 1,
+        })
+        self.assertFalse(FCMToken.objects.filter(token="token-1").exists())
+
+    def test_collects_transient_failures_for_retry(self):
+        users = [User.objects.create(username=f"user{index}", phone_number=f"010{index:08d}") for index in range(4)]
+        FCMToken.objects.bulk_create([
+            FCMToken(user=users[0], token="ok"),
+            FCMToken(user=users[1], token="down"),
+            FCMToken(user=users[2], token="gone"),
+            FCMToken(user=users[3], token="down-tablet"),
+            FCMToken(user=users[3], token="ok-phone"),
+        ])
+        transport = FakeTransport(errors={"down": "UNAVAILABLE", "gone": "UNREGISTERED", "down-tablet": "UNAVAILABLE"})
 
-# Create your tests here.
+        retry = []
+        with mock.patch("builtins.print"):
+            send_notifications([(user.id, "제목", "내용") for user in users], transport=transport, retry=retry)
+        # 일시적 오류로 모든 기기에 실패한 사용자만 재시도 (일부 기기 성공, 등록 해제는 제외)
+        self.assertEqual(retry, [(users[1].id, "제목", "내용")])
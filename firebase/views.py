@@ -4,7 +4,7 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from .serializers import FCMTokenSerializer
 from rest_framework import status
-from .send_message import send_notification
+from .send_message import send_notification, NotificationError
 # FCM 토큰 등록 API
 class FCMTokenRegisterView(APIView):
     permission_classes = [IsAuthenticated]
@@ -29,5 +29,8 @@ class TestNotificationView(APIView):
 
     def post(self, request):
         user = request.user
-        send_notification(user, "테스트 알림", "이것은 테스트 알림입니다.")
+        try:
+            send_notification(user, "테스트 알림", "이것은 테스트 알림입니다.")
+        except NotificationError as e:
+            return Response({"message": f"Notification failed: {e.code}"}, status=status.HTTP_502_BAD_GATEWAY)
         return Response({"message": "Notification sent!"})
\ No newline at end of file
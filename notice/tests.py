@@ -1,3 +1,42 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from dispatch.models import OutboxMessage
+from dispatch.outbox import process_due_messages
+from firebase.send_message import FakeTransport
+from user.models import User, Notification
+from .models import Notice
+
+
+# 공지사항 전체 알림: topic 푸시 한 번, 사용자별 알림함은 일괄 저장
+class NoticeBroadcastTest(TestCase):
+    def setUp(self):
+        self.transport = FakeTransport()
+        patcher = mock.patch("firebase.send_message.get_transport", return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = [User.objects.create(username=f"user{index}", phone_number=f"0101234567{index}") for index in range(3)]
+        self.users[0].is_staff = True
+        self.users[0].save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_notice_is_sent_once_to_topic(self):
+        response = self.client.post("/notices", {"type": "일반", "title": "점검 안내", "detail": "서버 점검이 있습니다."})
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(process_due_messages(), (2, 0))
+        self.assertEqual([message.topic for message in self.transport.sent], ["notices"])
+        self.assertEqual(
+            sorted(Notification.objects.filter(category="공지사항").values_list("user_id", flat=True)),
+            sorted(user.id for user in self.users),
+        )
 
-# Create your tests here.
+    def test_non_staff_cannot_broadcast(self):
+        self.client.force_authenticate(user=self.users[1])
+        response = self.client.post("/notices", {"type": "일반", "title": "광고", "detail": "스팸"})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Notice.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
@@ -2,15 +2,33 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from .models import Notice
 from .serializers import NoticeSerializer
 from config.pagination import Pagination
+from dispatch.outbox import enqueue_notice_broadcast
 
-from django.db.models import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import ObjectDoesNotExist, Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+# 공지사항 목록 ETag (공지 수 + 마지막 수정 시간)
+def get_notice_list_etag(request, *args, **kwargs):
+    notices = Notice.objects.aggregate(count=Count("id"), last_updated=Max("updated_at"))
+    last_updated = notices["last_updated"].timestamp() if notices["last_updated"] else 0
+    return f"notices-{notices['count']}-{last_updated}"
 
 class NoticeList(APIView):
 
-    # 공지사항 조회
+    # 공지사항 저장은 관리자만 (전체 사용자에게 알림 전송)
+    def get_permissions(self):
+        if self.request.method == "POST":
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    # 공지사항 조회 (If-None-Match 일치 시 304)
+    @method_decorator(condition(etag_func=get_notice_list_etag))
     def get(self, request):
         try:
             queryset = Notice.objects.all().order_by('-created_at')
@@ -53,12 +71,14 @@ class NoticeList(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     
-    # 공지사항 저장
+    # 공지사항 저장 (topic 푸시, 사용자 알림함 저장은 전송 대기열에 기록)
     def post(self, request):
         try:
             serializer = NoticeSerializer(data=request.data)
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    notice = serializer.save()
+                    enqueue_notice_broadcast(notice)
                 return Response({
                     "result": "true",
                     "message": "공지사항 저장 성공",
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
 from django.conf import settings
+from .notification_cache import invalidate_all_unread_counts
 
 class UserManager(BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
@@ -63,3 +64,25 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)  # 읽음 여부
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)  # 카테고리
     created_at = models.DateTimeField(auto_now_add=True)  # 생성 시간
+
+    # 활성 사용자 전체에게 같은 알림 저장 (batch_size 단위 bulk insert, 생성한 수 반환)
+    @classmethod
+    def create_for_all_users(cls, title, content, category, batch_size=5000):
+        user_ids = User.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+        created_count = 0
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(cls(user_id=user_id, title=title, content=content, category=category))
+            if len(batch) == batch_size:
+                cls.objects.bulk_create(batch)
+                created_count += len(batch)
+                batch = []
+        cls.objects.bulk_create(batch)
+        invalidate_all_unread_counts()
+        return created_count + len(batch)
+
+    class Meta:
+        indexes = [
+            # 안 읽은 알림 수, 일괄 읽음 처리
+            models.Index(fields=["user", "is_read"], name="notification_unread_idx", condition=models.Q(is_read=False)),
+        ]
@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+UNREAD_COUNT_KEY = "notifications:unread:{user_id}:{version}"  # 사용자별 안 읽은 알림 수
+BROADCAST_VERSION_KEY = "notifications:broadcast_version"  # 전체 알림 저장 시 증가 (모든 사용자의 카운터 무효화)
+UNREAD_COUNT_TIMEOUT = 10 * 60  # 카운터 유지 시간 (초), 만료되면 DB에서 다시 계산
+
+
+def _get_broadcast_version():
+    version = cache.get(BROADCAST_VERSION_KEY)
+    if version is None:
+        cache.add(BROADCAST_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(BROADCAST_VERSION_KEY)
+    return version
+
+
+def _get_key(user_id):
+    return UNREAD_COUNT_KEY.format(user_id=user_id, version=_get_broadcast_version())
+
+
+# 안 읽은 알림 수 (캐시에 없으면 DB에서 계산 후 저장)
+def get_unread_count(user_id):
+    from .models import Notification
+
+    key = _get_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(key, count, timeout=UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+# 안 읽은 알림 수 증감 (커밋 이후 실행, 캐시에 없으면 다음 조회 시 DB에서 계산)
+def adjust_unread_count(user_id, delta):
+    if not delta:
+        return
+
+    def adjust():
+        key = _get_key(user_id)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)
+        except ValueError:
+            pass
+
+    transaction.on_commit(adjust)
+
+
+# 전체 사용자 알림 저장 후 모든 카운터 무효화 (커밋 이후 실행)
+def invalidate_all_unread_counts():
+    def bump():
+        try:
+            cache.incr(BROADCAST_VERSION_KEY)
+        except ValueError:
+            cache.set(BROADCAST_VERSION_KEY, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
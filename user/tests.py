@@ -1,3 +1,65 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import User, Notification
+from .notification_cache import adjust_unread_count
+
+
+# 안 읽은 알림 수 캐시와 일괄 읽음 처리
+class NotificationUnreadCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester", phone_number="01012345678")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.notifications = [
+            Notification.objects.create(user=self.user, title=f"알림 {index}", content="내용", category="견적")
+            for index in range(5)
+        ]
+
+    def get_unread_count(self):
+        return self.client.get("/users/notifications/unread-count").data["data"]["unread_count"]
+
+    def test_unread_count_is_cached(self):
+        self.assertEqual(self.get_unread_count(), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_unread_count(), 5)
+
+    def test_bulk_mark_read_updates_count(self):
+        self.assertEqual(self.get_unread_count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/users/notifications", {"before_id": self.notifications[3].id}, format="json"
+            )
+        self.assertEqual(response.data["data"]["updated_count"], 3)
+        self.assertEqual(self.get_unread_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/users/notifications", {"all": True}, format="json")
+        self.assertEqual(self.get_unread_count(), 0)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_concurrent_mark_read_decrements_once(self):
+        self.assertEqual(self.get_unread_count(), 5)
+        notification = self.notifications[0]
+
+        # 다른 요청이 먼저 읽음 처리한 뒤 이전에 조회한 알림으로 다시 읽음 처리
+        stale = Notification.objects.get(id=notification.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.filter(id=notification.id).update(is_read=True)
+            adjust_unread_count(self.user.id, -1)
+        with mock.patch.object(Notification.objects, "get", return_value=stale):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch("/users/notifications", {"notification_id": notification.id}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_unread_count(), 4)
 
-# Create your tests here.
+    def test_broadcast_invalidates_count(self):
+        self.assertEqual(self.get_unread_count(), 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.create_for_all_users("공지", "내용", "공지사항")
+        self.assertEqual(self.get_unread_count(), 6)
@@ -7,4 +7,5 @@ urlpatterns = [
     path('codes', views.SendCodeView.as_view(), name='send_code'), # 전화번호 인증 전송
     path('codes/verify', views.VerifyCodeView.as_view(), name='verify_code'), # 전화번호 인증 확인
     path("notifications", views.NotificationView.as_view(), name="notification-list"), # 알림 목록(get), 알림 읽음 여부(patch)    
+    path("notifications/unread-count", views.NotificationUnreadCountView.as_view(), name="notification-unread-count"), # 안 읽은 알림 수
 ]
\ No newline at end of file
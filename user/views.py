@@ -13,6 +13,7 @@ from datetime import datetime
 from config.pagination import Pagination
 from .models import Notification
 from .serializers import NotificationSerializer
+from .notification_cache import get_unread_count, adjust_unread_count
 # from firebase.send_message import send_fcm_notification
 from firebase.models import FCMToken
 
@@ -261,8 +262,11 @@ class NotificationView(APIView):
             }
         })
 
-    # 알림 읽음 여부
+    # 알림 읽음 여부 (notification_ids, before_id, all 중 하나가 있으면 일괄 읽음 처리)
     def patch(self, request) :
+        if any(key in request.data for key in ('notification_ids', 'before_id', 'all')):
+            return self.bulk_mark_read(request)
+
         # 알림 ID를 request로 받음음
         notification_id = request.data.get('notification_id')
     
@@ -295,9 +299,12 @@ class NotificationView(APIView):
                 }
             }, status=status.HTTP_200_OK)   
              
-        # 읽음 여부 수정하고 저장
+        # 읽음 여부 수정 (같은 알림을 동시에 읽음 처리해도 실제로 변경한 요청만 안 읽은 알림 수를 줄임)
+        updated_count = Notification.objects.filter(
+            id=notification.id, user=request.user, is_read=False
+        ).update(is_read=True)
+        adjust_unread_count(request.user.id, -updated_count)
         notification.is_read = True
-        notification.save()
 
         # 응답 생성
         return Response(
@@ -312,5 +319,57 @@ class NotificationView(APIView):
             status=status.HTTP_200_OK
         )
 
+    # 알림 일괄 읽음 처리 (UPDATE 한 번)
+    # notification_ids: 알림 ID 목록, before_id: 해당 ID 이전 알림 전체, all: 전체
+    def bulk_mark_read(self, request):
+        notifications = Notification.objects.filter(user=request.user, is_read=False)
+
+        notification_ids = request.data.get('notification_ids')
+        before_id = request.data.get('before_id')
+        if notification_ids is not None:
+            if not isinstance(notification_ids, list) or not all(isinstance(item, int) for item in notification_ids):
+                return Response({
+                    'result': 'false',
+                    'message': 'notification_ids는 알림 ID 목록이어야 합니다.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            notifications = notifications.filter(id__in=notification_ids)
+        elif before_id is not None:
+            if not isinstance(before_id, int):
+                return Response({
+                    'result': 'false',
+                    'message': 'before_id는 알림 ID여야 합니다.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            notifications = notifications.filter(id__lt=before_id)
+        elif request.data.get('all') is not True:
+            return Response({
+                'result': 'false',
+                'message': '읽음 처리할 알림이 지정되지 않았습니다.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_count = notifications.update(is_read=True)
+        adjust_unread_count(request.user.id, -updated_count)
+
+        return Response({
+            "result": "true",
+            "message": f"알림 {updated_count}건을 읽음으로 변경했습니다.",
+            "data": {
+                "updated_count": updated_count
+            }
+        }, status=status.HTTP_200_OK)
+
+
+# 안 읽은 알림 수 (앱 배지용, 캐시된 카운터)
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({
+            "result": "true",
+            "message": "안 읽은 알림 수 조회 성공",
+            "data": {
+                "unread_count": get_unread_count(request.user.id)
+            }
+        }, status=status.HTTP_200_OK)
+
 
 